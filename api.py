@@ -6,13 +6,26 @@ from lexer import Lexer
 from parser import Parser, print_ast_tree
 from semantic_analyzer import SemanticAnalyzer
 from intermediate import TACGenerator
-from optimizer import Optimizer
-from simulator import simulate_return
+from optimizer import Optimizer, DEFAULT_OPT_LEVEL
+from simulator import simulate_return, Budget
 
 import io
 import sys
 import traceback
 
+# Limits on the simulation of one request, so that a program that never
+# ends cannot hold a worker; requests may only lower them
+DEFAULT_MAX_STEPS = 10_000_000
+DEFAULT_TIMEOUT = 5.0
+
+def budget_limit(data, key, default, types):
+    # A request may lower a limit but not raise or remove it. Returns None
+    # for a missing, null, non-numeric or negative value.
+    value = data.get(key, default)
+    if type(value) not in types or not 0 <= value:
+        return None
+    return min(value, default)
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
@@ -20,6 +33,15 @@ CORS(app)  # Enable CORS for all routes
 def compile_code():
     data = request.get_json()
     code = data.get('code', '')
+    opt_level = data.get('opt_level', DEFAULT_OPT_LEVEL)
+    enable_passes = data.get('enable_passes', [])
+    disable_passes = data.get('disable_passes', [])
+    profile = data.get('profile', False)
+    max_steps = budget_limit(data, 'max_steps', DEFAULT_MAX_STEPS, (int,))
+    timeout = budget_limit(data, 'timeout', DEFAULT_TIMEOUT, (int, float))
+    if max_steps is None or timeout is None:
+        return jsonify({'output': '', 'error': "max_steps and timeout must be non-negative numbers"}), 400
+    budget = Budget(max_steps, timeout)
     try:
         output = io.StringIO()
         old_stdout = sys.stdout
@@ -33,7 +55,7 @@ def compile_code():
         for t in tokens:
             print(t)
         for token in tokens:
-            print(f"{token.type}: {token.value}")
+            print(f"{token.name}: {token.value}")
 
         # PHASE 2: SYNTAX ANALYSIS / AST
         print("PHASE 2: Syntax Analysis / AST Construction")
@@ -62,18 +84,27 @@ def compile_code():
 
         # PHASE 5: OPTIMIZATION
         print("PHASE 5: Optimization")
-        optimizer = Optimizer(tac_code)
+        optimizer = Optimizer(tac_code, opt_level, enable_passes, disable_passes)
         optimized_code = optimizer.optimize()
         for line in optimized_code:
             print(line)
+        for line in optimizer.report():
+            print(line)
 
         # PHASE 6: SIMULATION
         print("PHASE 6: Simulation")
-        simulate_return(tac_code)
+        run_profile = simulate_return(optimized_code, profile=profile, budget=budget)
+        if run_profile is not None:
+            print("Execution Profile")
+            for line in run_profile.listing():
+                print(line)
 
         sys.stdout = old_stdout
         result = output.getvalue()
-        return jsonify({'output': result})
+        response = {'output': result, 'stats': optimizer.stats, 'budget': budget.report()}
+        if run_profile is not None:
+            response['profile'] = run_profile.report()
+        return jsonify(response)
     except Exception as e:
         sys.stdout = old_stdout
         print("Backend error:", e)
@@ -0,0 +1,195 @@
+import mmap
+import struct
+import sys
+from array import array
+
+from peephole import is_label, split_instr
+
+# ---------- Binary object format for generated assembly ----------
+# assemble() encodes CodeGenerator / PeepholeOptimizer output into columns
+# like InstrArray's: per instruction a one-byte opcode, one byte holding
+# the kinds of its two operands and two operand values. As in InstrArray,
+# the generated names t<N>, L<N> and the registers R<N> are packed into the
+# value itself (the number N); any other operand -- a variable, constant or
+# comment -- is an index into a table of operand text. Labels and comments
+# are not instructions; they are kept as marks (position, value << 3 | kind),
+# a comment's text keeping its ";", so lines() gives back the exact
+# assembly text.
+#
+# File layout, little-endian, every section padded to 4 bytes:
+#   header   magic, version, operand width (2 or 4 bytes) and counts
+#   ops      one byte per instruction, an index into MNEMONICS
+#   kinds    one byte per instruction: first operand kind | second << 4
+#   dests    first operand value of each instruction
+#   srcs     second operand value of each instruction
+#   marks    two uint32 per label or comment
+#   offsets  uint32 start of each table entry in the text block, plus the end
+#   text     the operand table, UTF-8
+# load_object() maps a file and reads the columns in place, without parsing.
+
+MNEMONICS = ("MOV", "ADD", "SUB", "MUL", "DIV", "MOD", "AND", "OR",
+             "SEQ", "SNE", "SLT", "SGT", "SLE", "SGE", "NOT", "CMP", "JE", "JMP", "RET")
+OPCODES = {name: opcode for opcode, name in enumerate(MNEMONICS)}
+
+# Operand kinds
+NONE, TABLE, TEMP, LABEL, REGISTER = range(5)
+PACKED_PREFIXES = {"t": TEMP, "L": LABEL, "R": REGISTER}
+PREFIXES = {kind: prefix for prefix, kind in PACKED_PREFIXES.items()}
+
+MAGIC = b"TOBJ"
+VERSION = 1
+HEADER = struct.Struct("<4sHHIII")    # magic, version, width, instructions, marks, operands
+WIDTH_TYPECODES = {2: "H", 4: "I"}
+LITTLE_ENDIAN = sys.byteorder == "little"
+
+class ObjectCode:
+    # Assembled code: parallel ops / kinds / dests / srcs columns (arrays, or
+    # memoryviews over a mapped file), the marks and the operand table.
+    def __init__(self, ops, kinds, dests, srcs, marks, operands, width):
+        self.ops = ops
+        self.kinds = kinds
+        self.dests = dests
+        self.srcs = srcs
+        self.marks = marks
+        self.operands = operands
+        self.width = width
+
+    def __len__(self):
+        return len(self.ops)
+
+    def decode(self, kind, value):
+        # Operand text, or None for a missing operand
+        if kind == TABLE:
+            return self.operands[value]
+        if kind == NONE:
+            return None
+        return f"{PREFIXES[kind]}{value}"
+
+    def instructions(self):
+        # (mnemonic, [operands]) for every instruction
+        decode = self.decode
+        for op, kinds, dest, src in zip(self.ops, self.kinds, self.dests, self.srcs):
+            args = [decode(kinds & 15, dest), decode(kinds >> 4, src)]
+            yield MNEMONICS[op], [arg for arg in args if arg is not None]
+
+    def lines(self):
+        # The assembly text this was assembled from
+        marks = self.marks
+        lines = []
+        mark = 0
+        for position, (name, args) in enumerate(self.instructions()):
+            while mark < len(marks) and marks[mark] == position:
+                lines.append(self.mark_line(marks[mark + 1]))
+                mark += 2
+            lines.append(f"{name} {', '.join(args)}" if args else name)
+        while mark < len(marks):
+            lines.append(self.mark_line(marks[mark + 1]))
+            mark += 2
+        return lines
+
+    def mark_line(self, code):
+        text = self.decode(code & 7, code >> 3)
+        return text if text.startswith(";") else f"{text}:"
+
+    def size(self):
+        # Bytes taken by the object file
+        return sum(len(section) for section in self.sections())
+
+    def sections(self):
+        text = [operand.encode("utf-8") for operand in self.operands]
+        offsets = array("I", [0])
+        for data in text:
+            offsets.append(offsets[-1] + len(data))
+        typecode = WIDTH_TYPECODES[self.width]
+        yield HEADER.pack(MAGIC, VERSION, self.width, len(self.ops), len(self.marks) // 2, len(self.operands))
+        for column in (array("B", self.ops), array("B", self.kinds), array(typecode, self.dests),
+                       array(typecode, self.srcs), array("I", self.marks), offsets):
+            if not LITTLE_ENDIAN:
+                column.byteswap()
+            yield padded(column.tobytes())
+        yield b"".join(text)
+
+    def write(self, path):
+        with open(path, "wb") as file:
+            for section in self.sections():
+                file.write(section)
+
+def padded(data):
+    return data + bytes(-len(data) % 4)
+
+def assemble(asm):
+    operands = []
+    indexes = {}
+
+    def operand(text):
+        # (kind, value) of an operand
+        kind = PACKED_PREFIXES.get(text[:1])
+        if kind is not None:
+            digits = text[1:]
+            if digits.isdigit() and len(digits) < 9 and (digits[:1] != "0" or digits == "0" and kind == REGISTER):
+                return kind, int(digits)
+        index = indexes.get(text)
+        if index is None:
+            index = indexes[text] = len(operands)
+            operands.append(text)
+        return TABLE, index
+
+    ops = array("B")
+    kinds = array("B")
+    dests = []
+    srcs = []
+    marks = array("I")
+    for line in asm:
+        if not line:
+            continue
+        if line.startswith(";") or is_label(line):
+            kind, value = operand(line if line.startswith(";") else line[:-1])
+            marks.extend((len(ops), value << 3 | kind))
+            continue
+        name, args = split_instr(line)
+        if name not in OPCODES or len(args) > 2:
+            raise Exception(f"Cannot assemble: {line}")
+        dest_kind, dest = operand(args[0]) if args else (NONE, 0)
+        src_kind, src = operand(args[1]) if len(args) > 1 else (NONE, 0)
+        ops.append(OPCODES[name])
+        kinds.append(dest_kind | src_kind << 4)
+        dests.append(dest)
+        srcs.append(src)
+
+    # Operand values take two bytes when they all fit
+    width = 2 if max(dests + srcs, default=0) <= 0xFFFF else 4
+    typecode = WIDTH_TYPECODES[width]
+    return ObjectCode(ops, kinds, array(typecode, dests), array(typecode, srcs), marks, operands, width)
+
+def load_object(path):
+    # Maps the file read-only; the columns are memoryviews over the mapping
+    with open(path, "rb") as file:
+        data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(data)
+    magic, version, width, count, mark_count, operand_count = HEADER.unpack_from(view)
+    if magic != MAGIC or version != VERSION or width not in WIDTH_TYPECODES:
+        raise Exception(f"Not a tiny-compiler object file: {path}")
+
+    offset = HEADER.size
+
+    def column(typecode, length):
+        nonlocal offset
+        size = array(typecode).itemsize * length
+        section = view[offset:offset + size]
+        offset += size + (-size % 4)
+        if LITTLE_ENDIAN:
+            return section.cast(typecode)
+        values = array(typecode, section.tobytes())
+        values.byteswap()
+        return values
+
+    typecode = WIDTH_TYPECODES[width]
+    ops = column("B", count)
+    kinds = column("B", count)
+    dests = column(typecode, count)
+    srcs = column(typecode, count)
+    marks = column("I", 2 * mark_count)
+    offsets = column("I", operand_count + 1)
+    text = view[offset:offset + offsets[-1]]
+    operands = [str(text[offsets[index]:offsets[index + 1]], "utf-8") for index in range(operand_count)]
+    return ObjectCode(ops, kinds, dests, srcs, marks, operands, width)
@@ -0,0 +1,221 @@
+# ---------- Typed AST ----------
+# Every node kind is its own slotted class with explicit fields. The legacy
+# `label`/`children` view is derived from those fields so print_ast_tree and
+# other label-based tooling keep producing the same tree.
+
+class ASTNode:
+    __slots__ = ()
+
+    @property
+    def label(self):
+        return type(self).__name__
+
+    @property
+    def children(self):
+        return []
+
+    def __repr__(self):
+        return self.label
+
+class Block(ASTNode):
+    # Condition / Then / Else / Body wrappers, only built for the label view
+    __slots__ = ("kind", "statements")
+
+    def __init__(self, kind, statements):
+        self.kind = kind
+        self.statements = statements
+
+    @property
+    def label(self):
+        return self.kind
+
+    @property
+    def children(self):
+        return self.statements
+
+class Name(ASTNode):
+    # Bare identifier: declared names, assignment targets and type names
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+    @property
+    def label(self):
+        return self.name
+
+class Program(ASTNode):
+    __slots__ = ("functions",)
+
+    def __init__(self, functions):
+        self.functions = functions
+
+    @property
+    def children(self):
+        return self.functions
+
+class Function(ASTNode):
+    __slots__ = ("name", "body")
+
+    def __init__(self, name, body):
+        self.name = name
+        self.body = body
+
+    @property
+    def label(self):
+        return f"Function({self.name})"
+
+    @property
+    def children(self):
+        return self.body
+
+class VarDecl(ASTNode):
+    # declarators holds Name (plain declaration) or Init nodes
+    __slots__ = ("var_type", "declarators")
+
+    def __init__(self, var_type, declarators):
+        self.var_type = var_type
+        self.declarators = declarators
+
+    @property
+    def children(self):
+        return [Name(self.var_type)] + self.declarators
+
+class Init(ASTNode):
+    __slots__ = ("name", "expr")
+
+    def __init__(self, name, expr):
+        self.name = name
+        self.expr = expr
+
+    @property
+    def children(self):
+        return [Name(self.name), self.expr]
+
+class Assign(ASTNode):
+    __slots__ = ("name", "expr")
+
+    def __init__(self, name, expr):
+        self.name = name
+        self.expr = expr
+
+    @property
+    def children(self):
+        return [Name(self.name), self.expr]
+
+class Return(ASTNode):
+    __slots__ = ("expr",)
+
+    def __init__(self, expr):
+        self.expr = expr
+
+    @property
+    def children(self):
+        return [self.expr]
+
+class If(ASTNode):
+    __slots__ = ("condition", "then_body", "else_body")
+
+    def __init__(self, condition, then_body, else_body):
+        self.condition = condition
+        self.then_body = then_body
+        self.else_body = else_body
+
+    @property
+    def children(self):
+        children = [Block("Condition", [self.condition]), Block("Then", self.then_body)]
+        if self.else_body:
+            children.append(Block("Else", self.else_body))
+        return children
+
+class While(ASTNode):
+    __slots__ = ("condition", "body")
+
+    def __init__(self, condition, body):
+        self.condition = condition
+        self.body = body
+
+    @property
+    def children(self):
+        return [Block("Condition", [self.condition]), Block("Body", self.body)]
+
+class For(ASTNode):
+    __slots__ = ("init", "condition", "update", "body")
+
+    def __init__(self, init, condition, update, body):
+        self.init = init
+        self.condition = condition
+        self.update = update
+        self.body = body
+
+    @property
+    def children(self):
+        return [self.init, Block("Condition", [self.condition]), self.update, Block("Body", self.body)]
+
+class Break(ASTNode):
+    __slots__ = ()
+
+class Continue(ASTNode):
+    __slots__ = ()
+
+class ExprStmt(ASTNode):
+    __slots__ = ("expr",)
+
+    def __init__(self, expr):
+        self.expr = expr
+
+    @property
+    def children(self):
+        return [self.expr]
+
+class BinOp(ASTNode):
+    __slots__ = ("op", "left", "right")
+
+    def __init__(self, op, left, right):
+        self.op = op
+        self.left = left
+        self.right = right
+
+    @property
+    def label(self):
+        return f"Op({self.op})"
+
+    @property
+    def children(self):
+        return [self.left, self.right]
+
+class UnaryOp(ASTNode):
+    __slots__ = ("op", "operand")
+
+    def __init__(self, op, operand):
+        self.op = op
+        self.operand = operand
+
+    @property
+    def label(self):
+        return f"Op({self.op})"
+
+    @property
+    def children(self):
+        return [self.operand]
+
+class Number(ASTNode):
+    # value keeps the literal's source text, e.g. "10"
+    __slots__ = ("value",)
+
+    def __init__(self, value):
+        self.value = value
+
+    @property
+    def label(self):
+        return f"Number({self.value})"
+
+class Var(ASTNode):
+    __slots__ = ("name",)
+
+    def __init__(self, name):
+        self.name = name
+
+    @property
+    def label(self):
+        return f"Var({self.name})"
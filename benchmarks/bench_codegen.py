@@ -0,0 +1,25 @@
+# Code generation throughput (TAC lines per second) on one large function,
+# with every operand in memory (-O0) and with register allocation (-O1 up).
+#
+#   python benchmarks/bench_codegen.py [instructions]
+
+import sys
+
+from common import best_of, emit_function
+from codegen import CodeGenerator, REGISTERS
+from tac import InstrList, FUNCTION
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    code = InstrList()
+    code.emit(FUNCTION, "main")
+    emit_function(code, count)
+    print(f"{len(code)} TAC lines")
+
+    for name, registers in (("memory", None), ("registers", REGISTERS)):
+        lines = []
+        elapsed = best_of(lambda: lines.append(len(CodeGenerator(code, registers).generate())))
+        print(f"{name:>10} {elapsed * 1000:>9.1f} ms {len(code) / elapsed:>12,.0f} lines/s {lines[-1]:>10} asm lines")
+
+if __name__ == "__main__":
+    main()
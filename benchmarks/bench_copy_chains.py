@@ -0,0 +1,32 @@
+# Stress test: long chains of copies (x1 = x0, x2 = x1, ...) through both
+# execution backends. Every operand read is a single slot load, so the
+# chain length is bounded by memory, not by the recursion limit.
+#
+#   python benchmarks/bench_copy_chains.py [length]
+
+import sys
+import time
+
+from common import compile_to_tac, generate_copy_chain
+from jit import CompiledProgram
+from simulator import decode, execute
+
+def main():
+    length = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    tac = compile_to_tac(generate_copy_chain(length))
+    print(f"copy chain of {length}, {len(tac)} TAC instructions, recursion limit {sys.getrecursionlimit()}")
+
+    start = time.perf_counter()
+    value, steps = execute(*decode(tac))
+    elapsed = time.perf_counter() - start
+    assert value == 1, value
+    print(f"{'interpreter':>12} {elapsed * 1000:>9.1f} ms  (decode + run)")
+
+    start = time.perf_counter()
+    value = CompiledProgram(tac).run()
+    elapsed = time.perf_counter() - start
+    assert value == 1, value
+    print(f"{'jit':>12} {elapsed * 1000:>9.1f} ms  (compile + run)")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+# Memory for one function of N TAC instructions stored three ways: text
+# lines (the original representation), an InstrList of Instr records, and
+# the columnar InstrArray; filled directly, and by TACGenerator from a
+# generated program.
+#
+#   python benchmarks/bench_ir_memory.py [instructions]
+
+import sys
+import tracemalloc
+
+from common import emit_function, generate_program
+from intermediate import TACGenerator
+from lexer import Lexer
+from parser import Parser
+from tac import Instr, InstrArray, InstrList, format_instr
+
+class TextLines(list):
+    def emit(self, op, dest=None, a=None, b=None):
+        self.append(format_instr(Instr(op, dest, a, b)))
+
+def measure(build):
+    tracemalloc.start()
+    code = build()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return code, current
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    results = []
+    for name, factory in (("text lines", TextLines), ("InstrList", InstrList), ("InstrArray", InstrArray)):
+        code, used = measure(lambda: emit_function(factory(), count))
+        results.append((name, len(code), used))
+        del code
+
+    report("emitted directly", results)
+
+    # Statements of generate_program lower to about 18 instructions each
+    ast = Parser(Lexer(generate_program(max(count // 18, 1))).iter_tokens()).parse()
+    results = []
+    for name, factory in (("InstrList", InstrList), ("InstrArray", InstrArray)):
+        code, used = measure(lambda: TACGenerator(factory()).generate(ast))
+        results.append((name, len(code), used))
+        del code
+    report("through TACGenerator", results)
+
+def report(title, results):
+    baseline = results[0][2]
+    print(f"{title}: {results[0][1]} instructions")
+    for name, length, used in results:
+        print(f"{name:>12} {used / (1024 * 1024):>8.1f} MB {used / length:>7.1f} B/instr {baseline / used:>6.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,34 @@
+# Simulation speed: the TAC interpreter vs. the compiled-to-Python backend
+# (jit.py) on a loop-heavy program.
+#
+#   python benchmarks/bench_jit.py [iterations]
+
+import contextlib
+import io
+import sys
+import time
+
+from common import best_of, compile_to_tac, generate_loop_program
+from jit import CompiledProgram
+from simulator import simulate_return
+
+def interpret(tac):
+    with contextlib.redirect_stdout(io.StringIO()):
+        simulate_return(tac)
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200000
+    tac = compile_to_tac(generate_loop_program(iterations))
+
+    start = time.perf_counter()
+    program = CompiledProgram(tac)
+    compile_time = time.perf_counter() - start
+
+    interpreter = best_of(lambda: interpret(tac))
+    jit = best_of(program.run)
+    print(f"{iterations} loop iterations, {len(tac)} TAC instructions")
+    print(f"{'interpreter':>12} {interpreter * 1000:>10.1f} ms")
+    print(f"{'jit':>12} {jit * 1000:>10.1f} ms  (+{compile_time * 1000:.1f} ms compile)  {interpreter / jit:.1f}x")
+
+if __name__ == "__main__":
+    main()
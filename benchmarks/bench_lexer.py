@@ -0,0 +1,84 @@
+# Lexer throughput: the original tokenize (per-call regex build, one object
+# per token) vs. Lexer.tokenize filling the TokenStore columns directly.
+#
+#   python benchmarks/bench_lexer.py [max_mb]
+
+import re
+import sys
+
+from common import best_of, format_size, generate_source
+from lexer import Lexer
+
+class LegacyToken:
+    # The original token class, which legacy_tokenize builds
+    def __init__(self, type_, value):
+        self.type = type_
+        self.value = value
+
+def legacy_tokenize(source):
+    # Copy of the original Lexer.tokenize, kept here as the baseline.
+    token_specification = [
+        ('NUMBER',   r'\d+(\.\d+)?'),
+        ('ID',       r'[A-Za-z_]\w*'),
+        ('STRING',   r'"([^"\\]|\\.)*"'),
+        ('OP',       r'\+\+|--|==|!=|>=|<=|&&|\|\||[+\-*/%!=<>]'),
+        ('SEMI',     r';'),
+        ('LPAREN',   r'\('),
+        ('RPAREN',   r'\)'),
+        ('LBRACE',   r'\{'),
+        ('RBRACE',   r'\}'),
+        ('COMMA',    r','),
+        ('WHITESPACE', r'[ \t]+'),
+        ('NEWLINE',  r'\n'),
+        ('MISMATCH', r'.')
+    ]
+    token_regex = '|'.join(f'(?P<{name}>{pattern})' for name, pattern in token_specification)
+    keywords = {
+        'int', 'float', 'char', 'double', 'long', 'short', 'unsigned', 'signed', 'void',
+        'return', 'if', 'else', 'while', 'for', 'break', 'continue', 'do', 'switch', 'case', 'default',
+        'struct', 'union', 'enum', 'typedef', 'const', 'volatile', 'static', 'extern', 'auto', 'register',
+        'sizeof', 'goto'
+    }
+    tokens = []
+    for match in re.finditer(token_regex, source):
+        kind = match.lastgroup
+        value = match.group()
+        if kind == 'WHITESPACE' or kind == 'NEWLINE':
+            continue
+        elif kind == 'ID' and value in keywords:
+            tokens.append(LegacyToken("KEYWORD", value))
+        elif kind == 'ID':
+            tokens.append(LegacyToken("ID", value))
+        elif kind == 'NUMBER':
+            tokens.append(LegacyToken("NUMBER", value))
+        elif kind == 'STRING':
+            tokens.append(LegacyToken("STRING", value))
+        elif kind == 'OP':
+            tokens.append(LegacyToken("OP", value))
+        elif kind in {'SEMI', 'LPAREN', 'RPAREN', 'LBRACE', 'RBRACE', 'COMMA'}:
+            tokens.append(LegacyToken(kind, value))
+        elif kind == 'MISMATCH':
+            raise SyntaxError(f"Unexpected character: {value}")
+    return tokens
+
+def current_tokenize(source):
+    return Lexer(source).tokenize()
+
+def main():
+    max_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    sizes = [1024, 10 * 1024, 100 * 1024, 1024 * 1024, 10 * 1024 * 1024]
+    sizes = [size for size in sizes if size <= max_mb * 1024 * 1024]
+
+    print(f"{'input':>8} {'legacy MB/s':>12} {'current MB/s':>13} {'speedup':>8}")
+    for size in sizes:
+        source = generate_source(size)
+        # Small inputs are dominated by per-call setup, so run them in batches.
+        batch = max(1, (256 * 1024) // size)
+        legacy = best_of(lambda: [legacy_tokenize(source) for _ in range(batch)])
+        current = best_of(lambda: [current_tokenize(source) for _ in range(batch)])
+        megabytes = len(source) * batch / (1024 * 1024)
+        print(f"{format_size(size):>8} {megabytes / legacy:>12.2f} {megabytes / current:>13.2f} "
+              f"{legacy / current:>7.2f}x")
+
+if __name__ == "__main__":
+    main()
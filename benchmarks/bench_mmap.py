@@ -0,0 +1,65 @@
+# Time-to-first-token and peak RSS when lexing a large file: reading it into
+# a str (what main.py does by default) vs. lexing a memory-mapped buffer
+# (main.py --mmap). Each mode runs in a fresh interpreter so peak RSS is not
+# shared between them.
+#
+#   python benchmarks/bench_mmap.py [size_mb]
+
+import os
+import subprocess
+import sys
+import tempfile
+
+from common import ROOT, format_size, generate_source
+
+CHILD = r"""
+import mmap
+import resource
+import sys
+import time
+
+sys.path.insert(0, sys.argv[1])
+from lexer import Lexer
+
+path, mode = sys.argv[2], sys.argv[3]
+start = time.perf_counter()
+with open(path, "rb" if mode == "mmap" else "r") as f:
+    if mode == "mmap":
+        source = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    else:
+        source = f.read()
+tokens = Lexer(source).iter_tokens()
+next(tokens)
+first = time.perf_counter() - start
+count = 1 + sum(1 for _ in tokens)
+total = time.perf_counter() - start
+peak_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(first, total, count, peak_kb)
+"""
+
+def run(path, mode):
+    output = subprocess.run([sys.executable, "-c", CHILD, ROOT, path, mode],
+                            check=True, capture_output=True, text=True).stdout
+    first, total, count, peak_kb = output.split()
+    return float(first), float(total), int(count), int(peak_kb)
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 50
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "generated.c")
+        with open(path, "w") as f:
+            # Write in chunks so the generator itself stays small.
+            remaining = int(size_mb * 1024 * 1024)
+            while remaining > 0:
+                chunk = generate_source(min(remaining, 4 * 1024 * 1024))
+                f.write(chunk)
+                remaining -= len(chunk)
+
+        print(f"input: {format_size(os.path.getsize(path))}")
+        print(f"{'mode':>6} {'first token':>12} {'all tokens':>11} {'tokens':>10} {'peak RSS':>10}")
+        for mode in ("read", "mmap"):
+            first, total, count, peak_kb = run(path, mode)
+            print(f"{mode:>6} {first * 1000:>10.2f}ms {total:>10.2f}s {count:>10} {peak_kb / 1024:>8.1f}MB")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+# Size and load time of generated assembly as text lines vs. the binary
+# object format (assembler.py).
+#
+#   python benchmarks/bench_object.py [source bytes]
+
+import os
+import sys
+import tempfile
+
+from common import best_of, compile_to_tac, generate_source
+from assembler import assemble, load_object
+from codegen import CodeGenerator, REGISTERS
+from optimizer import Optimizer
+from peephole import PeepholeOptimizer
+
+def main():
+    size = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    code = Optimizer(compile_to_tac(generate_source(size))).optimize()
+    asm = PeepholeOptimizer(CodeGenerator(code, REGISTERS).generate()).optimize()
+    obj = assemble(asm)
+    assert obj.lines() == asm
+
+    with tempfile.TemporaryDirectory() as directory:
+        text_path = os.path.join(directory, "out.s")
+        obj_path = os.path.join(directory, "out.obj")
+        with open(text_path, "w") as file:
+            file.write("\n".join(asm) + "\n")
+        obj.write(obj_path)
+
+        def read_text():
+            with open(text_path) as file:
+                return file.read().splitlines()
+
+        text_size = os.path.getsize(text_path)
+        obj_size = os.path.getsize(obj_path)
+        print(f"{len(asm)} asm lines, {len(obj)} instructions")
+        print(f"{'text':>8} {text_size:>10} bytes  load {best_of(read_text) * 1000:>7.2f} ms")
+        print(f"{'object':>8} {obj_size:>10} bytes  load {best_of(lambda: load_object(obj_path)) * 1000:>7.2f} ms"
+              f"  {text_size / obj_size:.1f}x smaller")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+# Per-pass optimizer time at -O3 on one function with many sequential
+# loops.
+#
+#   python benchmarks/bench_optimizer.py [loops]
+
+import sys
+
+from common import compile_to_tac, generate_sequential_loops
+from optimizer import Optimizer
+
+def main():
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 800
+    tac = compile_to_tac(generate_sequential_loops(count))
+    print(f"{count} loops, {len(tac)} TAC instructions")
+    optimizer = Optimizer(tac, 3)
+    optimizer.optimize()
+    for line in optimizer.report():
+        print(line)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,30 @@
+# Per-pass throughput (AST nodes per second) on large synthetic programs.
+#
+#   python benchmarks/bench_passes.py [statements]
+
+import sys
+
+from common import best_of, count_nodes, generate_program
+from intermediate import TACGenerator
+from lexer import Lexer
+from parser import Parser
+from semantic_analyzer import SemanticAnalyzer
+
+def main():
+    statements = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    source = generate_program(statements)
+    ast = Parser(Lexer(source).iter_tokens()).parse()
+    nodes = count_nodes(ast)
+    print(f"{statements} statements, {nodes} AST nodes")
+
+    passes = [
+        ("parse", lambda: Parser(Lexer(source).iter_tokens()).parse()),
+        ("semantic", lambda: SemanticAnalyzer().analyze(ast)),
+        ("tac", lambda: TACGenerator().generate(ast)),
+    ]
+    for name, run in passes:
+        elapsed = best_of(run)
+        print(f"{name:>10} {elapsed * 1000:>9.1f} ms {nodes / elapsed:>12,.0f} nodes/s")
+
+if __name__ == "__main__":
+    main()
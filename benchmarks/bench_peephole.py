@@ -0,0 +1,26 @@
+# Peephole optimizer time on the assembly of deeply nested if/else
+# statements, whose jumps lower to long JMP-to-label chains.
+#
+#   python benchmarks/bench_peephole.py [depth ...]
+
+import sys
+import time
+
+from common import compile_to_tac, generate_nested_ifs
+from codegen import CodeGenerator, REGISTERS
+from optimizer import Optimizer
+from peephole import PeepholeOptimizer
+
+def main():
+    depths = [int(arg) for arg in sys.argv[1:]] or [250, 1000, 10000]
+    for depth in depths:
+        code = Optimizer(compile_to_tac(generate_nested_ifs(depth))).optimize()
+        asm = CodeGenerator(code, REGISTERS).generate()
+        peephole = PeepholeOptimizer(asm)
+        start = time.perf_counter()
+        peephole.optimize()
+        elapsed = time.perf_counter() - start
+        print(f"depth {depth:>6} {len(asm):>8} asm lines {elapsed * 1000:>10.1f} ms  saved {peephole.saved}")
+
+if __name__ == "__main__":
+    main()
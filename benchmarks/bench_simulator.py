@@ -0,0 +1,36 @@
+# Interpreter throughput (TAC instructions executed per second) on a
+# counting loop, with decoding timed separately, plain and profiled.
+#
+#   python benchmarks/bench_simulator.py [iterations]
+
+import sys
+import time
+
+from common import compile_to_tac, generate_loop_program
+from simulator import decode, decode_rows, execute, execute_profiled, layout, Profile
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    tac = compile_to_tac(generate_loop_program(iterations))
+
+    start = time.perf_counter()
+    code, values = decode(tac)
+    decode_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    value, steps = execute(code, values)
+    elapsed = time.perf_counter() - start
+    print(f"{iterations} loop iterations, {len(code)} decoded instructions, returned {value}")
+    print(f"decode {decode_time * 1000:>9.2f} ms")
+    print(f"run    {elapsed * 1000:>9.1f} ms {steps:>12,} steps {steps / elapsed:>12,.0f} steps/s")
+
+    rows, labels = layout(tac)
+    profile = Profile(rows, labels)
+    code, values = decode_rows(rows, labels)
+    start = time.perf_counter()
+    value, steps = execute_profiled(code, values, profile)
+    elapsed = time.perf_counter() - start
+    print(f"profile {elapsed * 1000:>8.1f} ms {steps:>12,} steps {steps / elapsed:>12,.0f} steps/s")
+
+if __name__ == "__main__":
+    main()
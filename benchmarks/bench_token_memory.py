@@ -0,0 +1,42 @@
+# Memory held by the token list: dict-backed Token objects with copied value
+# strings (the original representation) vs. the array-backed TokenStore.
+#
+#   python benchmarks/bench_token_memory.py [size_mb]
+
+import sys
+import tracemalloc
+
+from common import format_size, generate_source
+from lexer import Lexer
+
+class LegacyToken:
+    def __init__(self, type_, value):
+        self.type = type_
+        self.value = value
+
+def measure(build):
+    tracemalloc.start()
+    result = build()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return result, current
+
+def main():
+    size_mb = float(sys.argv[1]) if len(sys.argv) > 1 else 10
+    source = generate_source(int(size_mb * 1024 * 1024))
+
+    legacy, legacy_bytes = measure(
+        lambda: [LegacyToken(token.name, token.value) for token in Lexer(source).iter_tokens()])
+    slotted, slotted_bytes = measure(lambda: list(Lexer(source).iter_tokens()))
+    store, store_bytes = measure(lambda: Lexer(source).tokenize())
+
+    count = len(store)
+    print(f"input: {format_size(len(source))}, {count} tokens")
+    for name, used in (("dict-backed Token + str", legacy_bytes),
+                       ("list of slotted Token", slotted_bytes),
+                       ("TokenStore (arrays)", store_bytes)):
+        print(f"{name:<26} {used / (1024 * 1024):>8.1f} MB {used / count:>7.1f} B/token "
+              f"{legacy_bytes / used:>6.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,32 @@
+# Executed instructions and wall time of the generated assembly on the
+# register VM (vm.py), per optimization level, on a loop-heavy program.
+#
+#   python benchmarks/bench_vm.py [iterations]
+
+import sys
+import time
+
+from common import compile_to_tac, generate_loop_program
+from codegen import CodeGenerator, REGISTERS
+from optimizer import Optimizer, OPT_LEVELS
+from peephole import PeepholeOptimizer
+from vm import decode, execute
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    source = generate_loop_program(iterations)
+    print(f"{iterations} loop iterations")
+    for level in OPT_LEVELS:
+        code = Optimizer(compile_to_tac(source), level).optimize()
+        asm = CodeGenerator(code, REGISTERS if level > 0 else None).generate()
+        if level > 0:
+            asm = PeepholeOptimizer(asm).optimize()
+        program = decode(asm)
+        start = time.perf_counter()
+        value, steps = execute(*program)
+        elapsed = time.perf_counter() - start
+        print(f"-O{level} {len(program[0]):>6} instructions {steps:>12,} executed {elapsed * 1000:>9.1f} ms"
+              f" {steps / elapsed:>12,.0f} steps/s  returned {value}")
+
+if __name__ == "__main__":
+    main()
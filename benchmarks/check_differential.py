@@ -0,0 +1,135 @@
+# Differential check of the optimizer and the backends: random programs are
+# run unoptimized on the TAC interpreter, and every other level must return
+# the same value on the interpreter, the jit (jit.py) and the register VM
+# (vm.py) with 1, 2, 3 and 8 registers. Programs mix ints and floats,
+# including floats that overflow to inf and nan. Exits with status 1 on a mismatch.
+#
+#   python benchmarks/check_differential.py [seeds]
+
+import random
+import sys
+
+from common import compile_to_tac
+from codegen import CodeGenerator
+from jit import CompiledProgram
+from optimizer import Optimizer, OPT_LEVELS
+from peephole import PeepholeOptimizer
+from simulator import decode as decode_tac, execute as execute_tac
+from vm import decode, execute
+
+REGISTER_COUNTS = (1, 2, 3, 8)
+VARIABLES = ("a", "b", "c", "d")
+# Float literals (the lexer has no exponents, so 1e200 is spelled out).
+# Products of the big ones overflow to inf, and inf - inf or inf * 0 give nan.
+FLOATS = ("0.5", "2.5", "1000000000000.0", "1" + "0" * 200 + ".0")
+BINARY = ("+", "-", "*", "/", "%", "&&", "||", "==", "!=", "<", ">", "<=", ">=")
+
+class ProgramGenerator:
+    # One random main() over a few variables, with if/else and while loops.
+    # Loops count a fresh counter the body never assigns up to a small bound,
+    # so every program terminates.
+    def __init__(self, seed):
+        self.random = random.Random(seed)
+        self.counters = []
+        self.loops = 0
+
+    def operand(self):
+        choice = self.random.random()
+        if choice < 0.5:
+            return self.random.choice(VARIABLES + tuple(self.counters))
+        if choice < 0.6:
+            return self.float_literal()
+        value = self.random.randint(-9, 9)
+        return f"(0-{-value})" if value < 0 else str(value)
+
+    def float_literal(self):
+        literal = self.random.choice(FLOATS)
+        return f"(0-{literal})" if self.random.random() < 0.3 else literal
+
+    def expression(self, depth):
+        choice = self.random.random()
+        if depth == 0 or choice < 0.3:
+            return self.operand()
+        if choice < 0.4:
+            return f"!({self.expression(depth - 1)})"
+        op = self.random.choice(BINARY)
+        return f"({self.expression(depth - 1)} {op} {self.expression(depth - 1)})"
+
+    def block(self, depth, indent):
+        lines = []
+        for _ in range(self.random.randint(1, 4)):
+            lines.extend(self.statement(depth, indent))
+        return lines
+
+    def statement(self, depth, indent):
+        pad = "    " * indent
+        choice = self.random.random()
+        if choice < 0.3:
+            # Scale by a float, so values grow towards inf
+            name, source = self.random.choice(VARIABLES), self.random.choice(VARIABLES)
+            return [f"{pad}{name} = {source} * {self.float_literal()};"]
+        if depth == 0 or choice < 0.5:
+            return [f"{pad}{self.random.choice(VARIABLES)} = {self.expression(3)};"]
+        if choice < 0.75:
+            lines = [f"{pad}if ({self.expression(2)}) {{"]
+            lines.extend(self.block(depth - 1, indent + 1))
+            if self.random.random() < 0.5:
+                lines.append(f"{pad}}} else {{")
+                lines.extend(self.block(depth - 1, indent + 1))
+            lines.append(f"{pad}}}")
+            return lines
+        counter = f"i{self.loops}"
+        self.loops += 1
+        lines = [f"{pad}int {counter} = 0;",
+                 f"{pad}while ({counter} < {self.random.randint(0, 4)}) {{"]
+        self.counters.append(counter)
+        lines.extend(self.block(depth - 1, indent + 1))
+        self.counters.pop()
+        lines.append(f"{pad}    {counter} = {counter} + 1;")
+        lines.append(f"{pad}}}")
+        return lines
+
+    def program(self):
+        lines = ["int main() {"]
+        lines.extend(f"    int {name} = {self.random.randint(0, 9)};" for name in VARIABLES)
+        lines.extend(self.block(3, 1))
+        # Every variable shows in the result
+        lines.append("    return a + 3 * b + 7 * c + 11 * d;")
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+def results(source):
+    # (description, returned value) for every optimized run
+    for level in OPT_LEVELS:
+        if level == 0:
+            continue
+        code = Optimizer(compile_to_tac(source), level).optimize()
+        yield f"-O{level} interpreter", execute_tac(*decode_tac(code))[0]
+        yield f"-O{level} jit", CompiledProgram(code).run()
+        for count in REGISTER_COUNTS:
+            registers = tuple(f"R{number}" for number in range(1, count + 1))
+            asm = PeepholeOptimizer(CodeGenerator(code, registers).generate()).optimize()
+            yield f"-O{level} vm, {count} register(s)", execute(*decode(asm))[0]
+
+def same(value, expected):
+    # Equal and of the same type, counting nan as equal to nan
+    if type(value) is not type(expected):
+        return False
+    return value == expected or value != value and expected != expected
+
+def main():
+    seeds = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    failures = 0
+    for seed in range(seeds):
+        source = ProgramGenerator(seed).program()
+        expected = execute_tac(*decode_tac(compile_to_tac(source)))[0]
+        for run, value in results(source):
+            if not same(value, expected):
+                failures += 1
+                print(f"seed {seed}: {run} returned {value}, -O0 returned {expected}")
+                print(source)
+    print(f"{seeds} program(s), {failures} mismatch(es)")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
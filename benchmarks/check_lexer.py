@@ -0,0 +1,53 @@
+# Checks that lexing a str and lexing the same UTF-8 source memory-mapped
+# (main.py --mmap) give the same tokens, lines and columns, or the same
+# error. Exits with status 1 on a difference.
+#
+#   python benchmarks/check_lexer.py
+
+import mmap
+import os
+import sys
+import tempfile
+
+import common
+from lexer import Lexer
+
+SOURCES = [
+    "int main() {\n    int x = 3;\n    return x;\n}\n",
+    "int main() {\n    int café = 3;\n    return café;\n}\n",
+    "int main() {\n    int x = ٣;\n    return x;\n}\n",
+    "int main() {\n    int ẞ = 1;\n}\n",
+    'int main() {\n    int s = "héllo → 🐍";\n    return 0 ;}\n',
+    "// ünïcödé\nint main() { return 1; }\n",
+    "int main() {\n    return 1; } 🐍\n",
+]
+
+def lex(source):
+    # (name, value, line, column) of every token, or the error message
+    try:
+        return [(token.name, token.value, token.line, token.column) for token in Lexer(source).tokenize()]
+    except SyntaxError as e:
+        return str(e)
+
+def lex_mapped(text):
+    with tempfile.NamedTemporaryFile("wb", suffix=".c", delete=False) as file:
+        file.write(text.encode("utf-8"))
+    try:
+        with open(file.name, "rb") as f:
+            return lex(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ))
+    finally:
+        os.unlink(file.name)
+
+def main():
+    failures = 0
+    for text in SOURCES:
+        expected = lex(text)
+        for mode, result in (("bytes", lex(text.encode("utf-8"))), ("mmap", lex_mapped(text))):
+            if result != expected:
+                failures += 1
+                print(f"{mode} differs on {text!r}:\n  str:   {expected}\n  {mode}: {result}")
+    print(f"{len(SOURCES)} source(s), {failures} difference(s)")
+    sys.exit(1 if failures else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+import os
+import sys
+import time
+
+# Benchmarks import the compiler modules from the repository root.
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+FUNCTION_TEMPLATE = """int f{n}() {{
+    int a = {n};
+    int b = a * 2 + 7;
+    int c = 0;
+    while (c < b) {{
+        c = c + 1;
+        if (c % 3 == 0 && b != 0) {{
+            a = a + c;
+        }} else {{
+            a = a - 1;
+        }}
+    }}
+    return a;
+}}
+"""
+
+def generate_source(size_bytes):
+    # Repeat a small function until the source reaches the requested size.
+    parts = []
+    total = 0
+    n = 0
+    while total < size_bytes:
+        chunk = FUNCTION_TEMPLATE.format(n=n)
+        parts.append(chunk)
+        total += len(chunk)
+        n += 1
+    return "".join(parts)
+
+LOOP_TEMPLATE = """int main() {{
+    int i = 0;
+    int s = 0;
+    while (i < {iterations}) {{
+        s = s + i % 7;
+        if (s > 1000) {{
+            s = s - 1000;
+        }}
+        i = i + 1;
+    }}
+    return s;
+}}
+"""
+
+def generate_loop_program(iterations):
+    # A single hot counting loop, for the execution backends.
+    return LOOP_TEMPLATE.format(iterations=iterations)
+
+def generate_copy_chain(length):
+    # x1 = x0, x2 = x1, ... : one long chain of variable aliases.
+    lines = ["int main() {", "    int x0 = 1;"]
+    lines.extend(f"    int x{n} = x{n - 1};" for n in range(1, length + 1))
+    lines.append(f"    return x{length};")
+    lines.append("}")
+    return "\n".join(lines) + "\n"
+
+def emit_function(code, count):
+    # A long run of arithmetic, compares and branches over 64 variables and
+    # fresh temps, roughly the mix TACGenerator produces for loop bodies.
+    from tac import ADD, MUL, LT, COPY, IFNOT, LABEL, GOTO
+    names = [f"v{n}" for n in range(64)]
+    emitted = 0
+    n = 0
+    while emitted < count:
+        t1 = f"t{2 * n + 1}"
+        t2 = f"t{2 * n + 2}"
+        label = f"L{n + 1}"
+        x, y = names[n % 64], names[(n * 7) % 64]
+        code.emit(MUL, t1, x, n % 100)
+        code.emit(ADD, t2, t1, y)
+        code.emit(COPY, x, t2)
+        code.emit(LT, t1, x, 1000)
+        code.emit(IFNOT, label, t1)
+        code.emit(GOTO, label)
+        code.emit(LABEL, label)
+        emitted += 7
+        n += 1
+    return code
+
+def compile_to_tac(source):
+    from intermediate import TACGenerator
+    from lexer import Lexer
+    from parser import Parser
+    return TACGenerator().generate(Parser(Lexer(source).iter_tokens()).parse())
+
+def best_of(fn, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        if best is None or elapsed < best:
+            best = elapsed
+    return best
+
+def format_size(size_bytes):
+    if size_bytes >= 1024 * 1024:
+        return f"{size_bytes / (1024 * 1024):.0f} MB"
+    return f"{size_bytes / 1024:.0f} KB"
+
+STATEMENT_TEMPLATE = """    x{n} = (a + {n}) * (b - c) + x{p} % 7;
+    if (x{n} > a && b != {n}) {{
+        c = c + x{n};
+    }} else {{
+        c = c - 1;
+    }}
+"""
+
+def generate_program(statements):
+    # One function with a long straight run of statements and branches.
+    decls = "".join(f"    int x{n} = 0;\n" for n in range(statements))
+    body = "".join(STATEMENT_TEMPLATE.format(n=n, p=max(n - 1, 0)) for n in range(statements))
+    return f"int main() {{\n    int a = 1, b = 2, c = 3;\n{decls}{body}    return c;\n}}\n"
+
+def generate_nested_ifs(depth):
+    # `depth` if/else statements nested inside each other.
+    opens = "".join(f"    if (x > {n}) {{\n        x = x + 1;\n" for n in range(depth))
+    closes = "    } else {\n        x = x - 1;\n    }\n" * depth
+    return f"int main() {{\n    int x = 5;\n{opens}{closes}    return x;\n}}\n"
+
+SEQUENTIAL_LOOP_TEMPLATE = """    i = 0;
+    while (i < n) {{
+        int k{n} = n * {n};
+        s = s + k{n} + i;
+        i = i + 1;
+    }}
+"""
+
+def generate_sequential_loops(count):
+    # One function with `count` loops one after another, each with an
+    # invariant to hoist.
+    body = "".join(SEQUENTIAL_LOOP_TEMPLATE.format(n=n) for n in range(count))
+    return f"int main() {{\n    int n = 3, s = 0, i = 0;\n{body}    return s;\n}}\n"
+
+def count_nodes(node):
+    count = 0
+    stack = [node]
+    while stack:
+        node = stack.pop()
+        count += 1
+        stack.extend(node.children)
+    return count
@@ -0,0 +1,196 @@
+from tac import as_instrs, FUNCTION, LABEL, IFNOT, GOTO, RETURN
+
+# ---------- Basic blocks and control-flow graphs over TAC ----------
+
+class BasicBlock:
+    # A maximal straight-line run of instructions. A block starts at a
+    # LABEL (kept as its first instruction) or after a jump/return, and ends
+    # at IFNOT, GOTO or RETURN or just before the next LABEL.
+    __slots__ = ("index", "instrs", "preds", "succs")
+
+    def __init__(self, index, instrs):
+        self.index = index
+        self.instrs = instrs
+        self.preds = []
+        self.succs = []
+
+    @property
+    def label(self):
+        if self.instrs and self.instrs[0].op == LABEL:
+            return self.instrs[0].dest
+        return None
+
+    @property
+    def terminator(self):
+        if self.instrs and self.instrs[-1].op in (IFNOT, GOTO, RETURN):
+            return self.instrs[-1]
+        return None
+
+    def __repr__(self):
+        return f"B{self.index}"
+
+class CFG:
+    # Control-flow graph of one function. `blocks` is in layout order and
+    # blocks[0] is the entry; `header` is the FUNCTION instruction (or None
+    # for code outside any function). Block sets used by the analyses are
+    # ints with one bit per block index.
+    def __init__(self, instrs, header=None):
+        self.header = header
+        self.blocks = []
+        current = []
+        for instr in instrs:
+            if instr.op == LABEL and current:
+                self.add_block(current)
+                current = []
+            current.append(instr)
+            if instr.op in (IFNOT, GOTO, RETURN):
+                self.add_block(current)
+                current = []
+        if current:
+            self.add_block(current)
+        self.link()
+
+    def add_block(self, instrs):
+        self.blocks.append(BasicBlock(len(self.blocks), instrs))
+
+    def link(self):
+        # (Re)compute predecessor/successor edges from the block terminators
+        blocks = self.blocks
+        for index, block in enumerate(blocks):
+            block.index = index
+            block.preds = []
+            block.succs = []
+        self.label_blocks = {block.label: block for block in blocks if block.label is not None}
+        for block in blocks:
+            last = block.instrs[-1] if block.instrs else None
+            if last is not None and last.op in (GOTO, IFNOT):
+                target = self.label_blocks.get(last.dest)
+                if target is not None:
+                    block.succs.append(target)
+            falls_through = last is None or last.op not in (GOTO, RETURN)
+            if falls_through and block.index + 1 < len(blocks):
+                following = blocks[block.index + 1]
+                if following not in block.succs:
+                    block.succs.append(following)
+            for succ in block.succs:
+                succ.preds.append(block)
+        self.dominator_sets = None
+
+    @property
+    def entry(self):
+        return self.blocks[0] if self.blocks else None
+
+    def instructions(self):
+        # Flatten back into a single instruction list in layout order
+        code = [self.header] if self.header is not None else []
+        for block in self.blocks:
+            code.extend(block.instrs)
+        return code
+
+    def reverse_postorder(self):
+        # Blocks reachable from the entry, in reverse postorder (iteratively)
+        if not self.blocks:
+            return []
+        order = []
+        seen = {self.entry.index}
+        stack = [(self.entry, iter(self.entry.succs))]
+        while stack:
+            block, succs = stack[-1]
+            for succ in succs:
+                if succ.index not in seen:
+                    seen.add(succ.index)
+                    stack.append((succ, iter(succ.succs)))
+                    break
+            else:
+                stack.pop()
+                order.append(block)
+        order.reverse()
+        return order
+
+    def reachable(self):
+        return {block.index for block in self.reverse_postorder()}
+
+    def remove_unreachable(self):
+        # Drop blocks that cannot be reached from the entry; returns how many instructions went
+        reachable = self.reachable()
+        removed = sum(len(block.instrs) for block in self.blocks if block.index not in reachable)
+        if removed or len(reachable) != len(self.blocks):
+            self.blocks = [block for block in self.blocks if block.index in reachable]
+            self.link()
+        return removed
+
+    def dominators(self):
+        # dominators()[i] is the bit set of blocks dominating block i. Computed
+        # iteratively over reverse postorder; unreachable blocks are only
+        # dominated by themselves.
+        if self.dominator_sets is not None:
+            return self.dominator_sets
+        order = self.reverse_postorder()
+        everything = (1 << len(self.blocks)) - 1
+        doms = [1 << block.index for block in self.blocks]
+        reachable = 0
+        for block in order:
+            reachable |= 1 << block.index
+        for block in order[1:]:
+            doms[block.index] = everything
+        changed = True
+        while changed:
+            changed = False
+            for block in order[1:]:
+                new = everything
+                for pred in block.preds:
+                    if reachable >> pred.index & 1:
+                        new &= doms[pred.index]
+                new |= 1 << block.index
+                if new != doms[block.index]:
+                    doms[block.index] = new
+                    changed = True
+        self.dominator_sets = doms
+        return doms
+
+    def dominates(self, a, b):
+        return bool(self.dominators()[b.index] >> a.index & 1)
+
+    def immediate_dominators(self):
+        # Block index -> immediate dominator block (None for the entry and unreachable blocks)
+        doms = self.dominators()
+        idom = {}
+        for block in self.blocks:
+            strict = doms[block.index] & ~(1 << block.index)
+            idom[block.index] = None
+            for candidate in self.blocks:
+                if strict >> candidate.index & 1 and doms[candidate.index] == strict:
+                    idom[block.index] = candidate
+                    break
+        return idom
+
+    def dump(self):
+        lines = []
+        for block in self.blocks:
+            succs = ", ".join(repr(succ) for succ in block.succs) or "-"
+            lines.append(f"{block!r} ({block.label or 'fallthrough'}) -> {succs}")
+            lines.extend(f"    {str(instr).strip()}" for instr in block.instrs)
+        return lines
+
+def build_cfgs(code):
+    # Split TAC at its FUNCTION headers and build one CFG per function
+    cfgs = []
+    header = None
+    current = []
+    for instr in as_instrs(code):
+        if instr.op == FUNCTION:
+            if header is not None or current:
+                cfgs.append(CFG(current, header))
+            header = instr
+            current = []
+        else:
+            current.append(instr)
+    if header is not None or current:
+        cfgs.append(CFG(current, header))
+    return cfgs
+
+def flatten(cfgs):
+    code = []
+    for cfg in cfgs:
+        code.extend(cfg.instructions())
+    return code
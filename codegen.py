@@ -1,62 +1,126 @@
-import re
+from cfg import build_cfgs
+from regalloc import allocate_registers
+from tac import format_instr, format_operand, iter_rows, Instr, FUNCTION, LABEL, COPY, NOT, IFNOT, GOTO, RETURN, ADD, SUB, MUL, DIV, MOD, AND, OR, EQ, NE, LT, GT, LE, GE
+
+# Two-operand instructions: OP R1, src computes R1 = R1 op src. The
+# compare-and-set forms (SEQ, SLT, ...) leave 1 or 0 in R1.
+ASM_OPS = {ADD: "ADD", SUB: "SUB", MUL: "MUL", DIV: "DIV", MOD: "MOD", AND: "AND", OR: "OR",
+           EQ: "SEQ", NE: "SNE", LT: "SLT", GT: "SGT", LE: "SLE", GE: "SGE"}
+
+# Operators whose operands can be swapped
+COMMUTATIVE_ASM = frozenset({"ADD", "MUL", "AND", "OR", "SEQ", "SNE"})
+
+# Default register file. R0 holds return values; with allocation enabled the
+# first register of the file is the scratch register and the rest hold temps.
+REGISTERS = tuple(f"R{number}" for number in range(1, 9))
 
 class CodeGenerator:
-    def __init__(self, tac_lines):
+    def __init__(self, tac_lines, registers=None):
+        # registers: register file for TAC temps, or None to keep every
+        # operand in memory by name
         self.tac = tac_lines
+        self.registers = registers
+        self.scratch = registers[0] if registers else "R1"
+        self.location = {}
+        self.spilled = 0
         self.asm = []
 
+    def rows(self):
+        if self.registers is None:
+            yield from iter_rows(self.tac)
+            return
+        # One allocation per function, made just before its code is emitted.
+        # The location map is updated in place, as generate() holds on to it.
+        for cfg in build_cfgs(self.tac):
+            location, spilled = allocate_registers(cfg, self.registers[1:])
+            self.location.clear()
+            self.location.update(location)
+            self.spilled += len(spilled)
+            for instr in cfg.instructions():
+                yield instr.op, instr.dest, instr.a, instr.b
+
     def generate(self):
-        for line in self.tac:
-            line = line.strip()
+        # Only temps are keys of the location map, so a lookup with itself as
+        # the default gives any operand's location, constants included
+        where = self.location.get
+        emit = self.asm.append
+        scratch = self.scratch
+        asm_ops = ASM_OPS
+        for op, dest, a, b in self.rows():
+            if type(a) is float:
+                a = format_operand(a)
+            if type(b) is float:
+                b = format_operand(b)
 
-            # Skip comments
-            if line.startswith("#"):
-                self.asm.append(f"; {line[1:].strip()}")
-                continue
+            # x = y op z
+            if op in asm_ops:
+                self.emit_binary(asm_ops[op], dest, where(a, a), where(b, b))
 
-            # Labels
-            if line.endswith(":"):
-                self.asm.append(f"{line}")
-                continue
+            # x = y
+            elif op == COPY:
+                target = where(dest, dest)
+                source = where(a, a)
+                if target != source:
+                    emit(f"MOV {target}, {source}")
 
             # IF NOT cond GOTO label
-            match = re.match(r"IF NOT (\w+) GOTO (L\d+)", line)
-            if match:
-                cond, label = match.groups()
-                self.asm.append(f"CMP {cond}, 0")
-                self.asm.append(f"JE {label}")
-                continue
+            elif op == IFNOT:
+                emit(f"CMP {where(a, a)}, 0")
+                emit(f"JE {dest}")
+
+            # Labels
+            elif op == LABEL:
+                emit(f"{dest}:")
 
             # GOTO
-            match = re.match(r"GOTO (L\d+)", line)
-            if match:
-                self.asm.append(f"JMP {match.group(1)}")
-                continue
+            elif op == GOTO:
+                emit(f"JMP {dest}")
 
-            # RETURN
-            match = re.match(r"RETURN (\w+)", line)
-            if match:
-                self.asm.append(f"MOV R0, {match.group(1)}")
-                self.asm.append("RET")
-                continue
+            # x = ! y
+            elif op == NOT:
+                target = where(dest)
+                source = where(a, a)
+                if target is None:
+                    emit(f"MOV {scratch}, {source}")
+                    emit(f"NOT {scratch}")
+                    emit(f"MOV {dest}, {scratch}")
+                else:
+                    if source != target:
+                        emit(f"MOV {target}, {source}")
+                    emit(f"NOT {target}")
 
-            # x = y op z
-            match = re.match(r"(\w+)\s*=\s*(\w+)\s*([\+\-\*/])\s*(\w+)", line)
-            if match:
-                dest, src1, op, src2 = match.groups()
-                self.asm.append(f"MOV R1, {src1}")
-                asm_op = {"+" : "ADD", "-" : "SUB", "*" : "MUL", "/" : "DIV"}[op]
-                self.asm.append(f"{asm_op} R1, {src2}")
-                self.asm.append(f"MOV {dest}, R1")
-                continue
+            # RETURN
+            elif op == RETURN:
+                emit(f"MOV R0, {where(a, a)}")
+                emit("RET")
 
-            # x = y
-            match = re.match(r"(\w+)\s*=\s*(\w+)", line)
-            if match:
-                dest, src = match.groups()
-                self.asm.append(f"MOV {dest}, {src}")
-                continue
+            # Function header comment
+            elif op == FUNCTION:
+                emit(f"; Function Function({dest})")
 
-            self.asm.append(f"; Unrecognized TAC: {line}")
+            else:
+                emit(f"; Unrecognized TAC: {format_instr(Instr(op, dest, a, b))}")
 
         return self.asm
+
+    def emit_binary(self, name, dest, a, b):
+        # a and b are already operand locations
+        target = self.location.get(dest)
+        scratch = self.scratch
+        emit = self.asm.append
+        if target is None:
+            emit(f"MOV {scratch}, {a}")
+            emit(f"{name} {scratch}, {b}")
+            emit(f"MOV {dest}, {scratch}")
+        elif b == target and a != target:
+            # Loading a into the target register would overwrite b
+            if name in COMMUTATIVE_ASM:
+                emit(f"{name} {target}, {a}")
+            else:
+                emit(f"MOV {scratch}, {a}")
+                emit(f"{name} {scratch}, {b}")
+                emit(f"MOV {target}, {scratch}")
+        else:
+            if a != target:
+                emit(f"MOV {target}, {a}")
+            emit(f"{name} {target}, {b}")
@@ -0,0 +1,242 @@
+from itertools import count
+
+from tac import Instr, constant_key, ASSIGNMENTS, COPY, NOT, ADD, MUL, AND, OR, EQ, NE, IFNOT, RETURN, defined, used
+
+# ---------- Common subexpression elimination ----------
+# Two passes over one function's CFG:
+#   * local value numbering inside each block, which also forwards copies
+#     and constants to later uses in the block;
+#   * global CSE over available expressions, a forward must-analysis with
+#     int bit-vector sets.
+# Both only turn recomputations into copies and rewrite operands. The
+# instructions they add are collected in `created`, so the caller can drop
+# those left unused without touching the function's other dead stores.
+
+COMMUTATIVE = frozenset({ADD, MUL, AND, OR, EQ, NE})
+
+def operand_order(operand):
+    return (type(operand).__name__, str(operand))
+
+def expression_key(instr):
+    # Syntactic right-hand side of an assignment, operands of commutative
+    # operators in a fixed order
+    a, b = instr.a, instr.b
+    if instr.op in COMMUTATIVE and operand_order(b) < operand_order(a):
+        a, b = b, a
+    return (instr.op, constant_key(a), constant_key(b))
+
+def number_values(block, created):
+    # Local value numbering; returns the number of instructions rewritten
+    vn_of_name = {}
+    vn_of_key = {}
+    holder = {}      # value number -> a name holding it
+    constant = {}    # value number -> constant value
+    new_vn = count().__next__
+
+    def number(operand):
+        if type(operand) is str:
+            vn = vn_of_name.get(operand)
+            if vn is None:
+                vn = vn_of_name[operand] = new_vn()
+                holder[vn] = operand
+            return vn
+        key = ("const", constant_key(operand))
+        vn = vn_of_key.get(key)
+        if vn is None:
+            vn = vn_of_key[key] = new_vn()
+            constant[vn] = operand
+        return vn
+
+    def canonical(operand, vn):
+        # Constant or oldest name still holding this value
+        if vn in constant:
+            return constant[vn]
+        name = holder.get(vn)
+        if name is not None and vn_of_name.get(name) == vn:
+            return name
+        return operand
+
+    rewritten = 0
+    instrs = []
+    for instr in block.instrs:
+        new = instr
+        op = instr.op
+        if op in ASSIGNMENTS:
+            vn_a = number(instr.a)
+            a = canonical(instr.a, vn_a)
+            if op == COPY:
+                vn = vn_a
+                new = Instr(COPY, instr.dest, a)
+            else:
+                if op == NOT:
+                    b = None
+                    key = (op, vn_a, None)
+                else:
+                    vn_b = number(instr.b)
+                    b = canonical(instr.b, vn_b)
+                    if op in COMMUTATIVE and vn_b < vn_a:
+                        vn_a, vn_b = vn_b, vn_a
+                    key = (op, vn_a, vn_b)
+                vn = vn_of_key.get(key)
+                source = canonical(None, vn) if vn is not None else None
+                if source is not None:
+                    new = Instr(COPY, instr.dest, source)
+                    created.add(new)
+                else:
+                    if vn is None:
+                        vn = vn_of_key[key] = new_vn()
+                    new = Instr(op, instr.dest, a, b)
+            vn_of_name[instr.dest] = vn
+            name = holder.get(vn)
+            if name is None or vn_of_name.get(name) != vn:
+                holder[vn] = instr.dest
+        elif op == IFNOT or op == RETURN:
+            if type(instr.a) is str:
+                a = canonical(instr.a, number(instr.a))
+                if a != instr.a or type(a) is not str:
+                    new = Instr(op, instr.dest, a)
+        if new is not instr and (new.op, new.a, new.b) != (instr.op, instr.a, instr.b):
+            rewritten += 1
+            if instr in created:
+                created.add(new)
+        else:
+            new = instr
+        instrs.append(new)
+    block.instrs = instrs
+    return rewritten
+
+def to_bits(indexes, size):
+    # Bit set with the given bits, built in one go instead of OR-ing big ints together
+    data = bytearray((size + 7) // 8)
+    for index in indexes:
+        data[index >> 3] |= 1 << (index & 7)
+    return int.from_bytes(data, "little")
+
+class AvailableExpressions:
+    # Forward must-analysis over the expressions (op, a, b) computed in more
+    # than one block; expressions local to one block are left to value
+    # numbering. An expression is available when every path computes it
+    # after the last assignment to its operands.
+    def __init__(self, cfg):
+        self.cfg = cfg
+        blocks = cfg.blocks
+        self.keys = []
+        key_blocks = {}
+        for block in blocks:
+            keys = []
+            for instr in block.instrs:
+                key = None
+                if instr.op in ASSIGNMENTS and instr.op != COPY:
+                    key = expression_key(instr)
+                    key_blocks.setdefault(key, set()).add(block.index)
+                keys.append(key)
+            self.keys.append(keys)
+
+        self.expressions = [key for key, seen in key_blocks.items() if len(seen) > 1]
+        self.expression_index = {key: index for index, key in enumerate(self.expressions)}
+        mentions = {}
+        for index, (op, a, b) in enumerate(self.expressions):
+            for operand in (a, b):
+                if type(operand) is str:
+                    mentions.setdefault(operand, []).append(index)
+        size = len(self.expressions)
+        self.mentions = {name: to_bits(indexes, size) for name, indexes in mentions.items()}
+
+        # Block transfer functions
+        self.gen = [0] * len(blocks)
+        self.kill = [0] * len(blocks)
+        for block in blocks:
+            gen = kill = 0
+            for instr, key in zip(block.instrs, self.keys[block.index]):
+                gen, killed = self.step(gen, instr, key)
+                kill |= killed
+            self.gen[block.index] = gen
+            self.kill[block.index] = kill
+
+        everything = (1 << size) - 1
+        order = cfg.reverse_postorder()
+        self.avail_in = [0] * len(blocks)
+        avail_out = [everything] * len(blocks)
+        reached = {block.index for block in order}
+        changed = True
+        while changed:
+            changed = False
+            for block in order:
+                index = block.index
+                avail = 0 if block is cfg.entry else everything
+                for pred in block.preds:
+                    if pred.index in reached:
+                        avail &= avail_out[pred.index]
+                out = self.gen[index] | (avail & ~self.kill[index])
+                self.avail_in[index] = avail
+                if out != avail_out[index]:
+                    avail_out[index] = out
+                    changed = True
+
+    def step(self, avail, instr, key):
+        # Effect of one instruction: returns (new available set, killed expressions)
+        dest = defined(instr)
+        if dest is None:
+            return avail, 0
+        killed = self.mentions.get(dest, 0)
+        if avail & killed:
+            avail &= ~killed
+        index = self.expression_index.get(key)
+        if index is not None and dest not in used(instr):
+            avail |= 1 << index
+        return avail, killed
+
+    def redundant(self):
+        # Expressions recomputed somewhere while already available
+        found = set()
+        for block in self.cfg.blocks:
+            avail = self.avail_in[block.index]
+            for instr, key in zip(block.instrs, self.keys[block.index]):
+                index = self.expression_index.get(key)
+                if index is not None and avail >> index & 1:
+                    found.add(key)
+                avail = self.step(avail, instr, key)[0]
+        return found
+
+    def rewrite(self, holders, created):
+        # holders maps each redundant expression to a fresh temp. Every
+        # computation of it also stores it in that temp; where it is
+        # available, the recomputation becomes a copy of the temp. Returns
+        # the number of recomputations replaced.
+        rewritten = 0
+        for block in self.cfg.blocks:
+            avail = self.avail_in[block.index]
+            instrs = []
+            for instr, key in zip(block.instrs, self.keys[block.index]):
+                holder = holders.get(key)
+                if holder is None:
+                    instrs.append(instr)
+                elif avail >> self.expression_index[key] & 1:
+                    instrs.append(Instr(COPY, instr.dest, holder))
+                    created.add(instrs[-1])
+                    rewritten += 1
+                else:
+                    instrs.append(Instr(instr.op, holder, instr.a, instr.b))
+                    instrs.append(Instr(COPY, instr.dest, holder))
+                    created.update(instrs[-2:])
+                avail = self.step(avail, instr, key)[0]
+            block.instrs = instrs
+        return rewritten
+
+def eliminate_common_subexpressions(cfg, new_temp, created=None):
+    # Returns the number of instructions rewritten; the instructions added go
+    # into `created`. new_temp gives holder temps unused anywhere in the
+    # program (see Optimizer.name_sources). Value numbering runs again after
+    # the global pass to forward the copies it introduced.
+    if created is None:
+        created = set()
+    rewritten = 0
+    for block in cfg.blocks:
+        rewritten += number_values(block, created)
+    available = AvailableExpressions(cfg)
+    redundant = available.redundant()
+    if redundant:
+        rewritten += available.rewrite({key: new_temp() for key in redundant}, created)
+        for block in cfg.blocks:
+            rewritten += number_values(block, created)
+    return rewritten
@@ -0,0 +1,123 @@
+from tac import defined, used
+
+# ---------- Dataflow analyses over a CFG ----------
+# Sets are Python ints used as bit vectors, one bit per variable. Only
+# "global" names -- ones read in some block before being assigned there --
+# get a bit: every other name (most temps) is dead on every block boundary,
+# so its liveness never leaves the block and the vectors stay short.
+
+class Liveness:
+    # Backward liveness: live_in[i] / live_out[i] are the global names live
+    # on entry to / exit from block i, iterated to a fixed point.
+    def __init__(self, cfg):
+        self.cfg = cfg
+        blocks = cfg.blocks
+
+        # Upward-exposed uses per block decide which names are global
+        exposed = []
+        self.var_index = var_index = {}
+        for block in blocks:
+            assigned = set()
+            block_exposed = []
+            for instr in block.instrs:
+                for name in used(instr):
+                    if name not in assigned:
+                        block_exposed.append(name)
+                        if name not in var_index:
+                            var_index[name] = len(var_index)
+                dest = defined(instr)
+                if dest is not None:
+                    assigned.add(dest)
+            exposed.append((block_exposed, assigned))
+
+        self.index_names = list(var_index)
+        self.use = [0] * len(blocks)
+        self.defs = [0] * len(blocks)
+        for block, (block_exposed, assigned) in zip(blocks, exposed):
+            use = defs = 0
+            for name in block_exposed:
+                use |= 1 << var_index[name]
+            for name in assigned:
+                index = var_index.get(name)
+                if index is not None:
+                    defs |= 1 << index
+            self.use[block.index] = use
+            self.defs[block.index] = defs
+
+        self.live_in = list(self.use)
+        self.live_out = [0] * len(blocks)
+        # Visiting blocks in postorder lets most information flow in one sweep
+        order = list(reversed(cfg.reverse_postorder()))
+        reached = {block.index for block in order}
+        order.extend(block for block in reversed(blocks) if block.index not in reached)
+        use, defs, live_in, live_out = self.use, self.defs, self.live_in, self.live_out
+        changed = True
+        while changed:
+            changed = False
+            for block in order:
+                index = block.index
+                out = 0
+                for succ in block.succs:
+                    out |= live_in[succ.index]
+                if out != live_out[index]:
+                    live_out[index] = out
+                    live_in[index] = use[index] | (out & ~defs[index])
+                    changed = True
+
+    def live_at_entry(self, name, block):
+        index = self.var_index.get(name)
+        return index is not None and bool(self.live_in[block.index] >> index & 1)
+
+    def names(self, bits):
+        # Names whose bits are set, lowest index first
+        names = []
+        index_names = self.index_names
+        while bits:
+            low = bits & -bits
+            names.append(index_names[low.bit_length() - 1])
+            bits ^= low
+        return names
+
+def eliminate_dead_code(cfg, only=None):
+    # Remove unreachable blocks and assignments whose value is never read.
+    # TAC assignments have no side effects, so any store that is dead after
+    # it is dropped. Walking each block backwards removes dead chains inside
+    # the block in one go; liveness is only recomputed when a removed
+    # instruction read a global name, since only then can a store in another
+    # block have become dead. With `only`, a set of instructions, just those
+    # may go and unreachable blocks stay. Returns the number of instructions
+    # removed.
+    removed = cfg.remove_unreachable() if only is None else 0
+    while True:
+        liveness = Liveness(cfg)
+        var_index = liveness.var_index
+        again = False
+        for block in cfg.blocks:
+            live = liveness.live_out[block.index]
+            local_live = set()
+            kept = []
+            for instr in reversed(block.instrs):
+                dest = defined(instr)
+                if dest is not None:
+                    index = var_index.get(dest)
+                    if index is None:
+                        dead = dest not in local_live
+                        local_live.discard(dest)
+                    else:
+                        dead = not live >> index & 1
+                        live &= ~(1 << index)
+                    if dead and (only is None or instr in only):
+                        removed += 1
+                        again = again or any(name in var_index for name in used(instr))
+                        continue
+                for name in used(instr):
+                    index = var_index.get(name)
+                    if index is None:
+                        local_live.add(name)
+                    else:
+                        live |= 1 << index
+                kept.append(instr)
+            kept.reverse()
+            block.instrs = kept
+        if not again:
+            return removed
@@ -1,6 +1,15 @@
-class TACGenerator:
-    def __init__(self):
-        self.code = []
+from ast_nodes import Init
+from tac import InstrArray, InstrList, OperandTable, BINARY_OPCODES, FUNCTION, LABEL, COPY, NOT, IFNOT, GOTO, RETURN, parse_number
+from visitor import NodeVisitor
+
+class TACGenerator(NodeVisitor):
+    # `code` can be a tac.InstrArray to emit into columnar storage; the
+    # default is a plain InstrList.
+    def __init__(self, code=None):
+        self.code = InstrList() if code is None else code
+        self.operands = getattr(self.code, "operands", None) or OperandTable()
+        # InstrArray packs temps into its codes, so they stay out of its table
+        self.intern_temps = not isinstance(self.code, InstrArray)
         self.temp_count = 0
         self.label_count = 0
         self.break_stack = []
@@ -8,125 +17,113 @@ class TACGenerator:
 
     def new_temp(self):
         self.temp_count += 1
-        return f"t{self.temp_count}"
+        name = f"t{self.temp_count}"
+        return self.operands.intern(name) if self.intern_temps else name
 
     def new_label(self):
         self.label_count += 1
         return f"L{self.label_count}"
 
     def generate(self, node):
-        if node.label == "Program":
-            for fn in node.children:
-                self.generate(fn)
-            return self.code
-
-        elif node.label.startswith("Function"):
-            self.code.append(f"\n# Function {node.label}")
-            for stmt in node.children:
-                self.generate(stmt)
-
-        elif node.label == "VarDecl":
-            # Handle initialized variables
-            for child in node.children[1:]:
-                if child.label == "Init":
-                    var_name = child.children[0].label
-                    expr_temp = self.generate(child.children[1])
-                    self.code.append(f"{var_name} = {expr_temp}")
-            return  # Declaration doesn't generate TAC for uninitialized
-
-        elif node.label == "Assign":
-            var_name = node.children[0].label
-            expr_temp = self.generate(node.children[1])
-            self.code.append(f"{var_name} = {expr_temp}")
-
-        elif node.label == "Return":
-            expr_temp = self.generate(node.children[0])
-            self.code.append(f"RETURN {expr_temp}")
-
-        elif node.label == "If":
-            cond = self.generate(node.children[0].children[0])  # node['Condition']
-            else_label = self.new_label()
-            end_label = self.new_label()
-
-            self.code.append(f"IF NOT {cond} GOTO {else_label}")
-            for stmt in node.children[1].children:  # Then
-                self.generate(stmt)
-            self.code.append(f"GOTO {end_label}")
-            self.code.append(f"{else_label}:")
-            if len(node.children) == 3:  # Has Else block
-                for stmt in node.children[2].children:
-                    self.generate(stmt)
-            self.code.append(f"{end_label}:")
-
-        elif node.label == "While":
-            start_label = self.new_label()
-            end_label = self.new_label()
-            self.continue_stack.append(start_label)
-            self.break_stack.append(end_label)
-            self.code.append(f"{start_label}:")
-            cond = self.generate(node.children[0].children[0])  # Condition
-            self.code.append(f"IF NOT {cond} GOTO {end_label}")
-            for stmt in node.children[1].children:  # Body
-                self.generate(stmt)
-            self.code.append(f"GOTO {start_label}")
-            self.code.append(f"{end_label}:")
-            self.continue_stack.pop()
-            self.break_stack.pop()
-
-        elif node.label == "For":
-            init = node.children[0]
-            cond = node.children[1].children[0]
-            update = node.children[2]
-            body = node.children[3].children
-            start_label = self.new_label()
-            end_label = self.new_label()
-            update_label = self.new_label()
-            self.generate(init)
-            self.code.append(f"{start_label}:")
-            cond_temp = self.generate(cond)
-            self.code.append(f"IF NOT {cond_temp} GOTO {end_label}")
-            self.continue_stack.append(update_label)
-            self.break_stack.append(end_label)
-            for stmt in body:
-                self.generate(stmt)
-            self.code.append(f"{update_label}:")
-            self.generate(update)
-            self.code.append(f"GOTO {start_label}")
-            self.code.append(f"{end_label}:")
-            self.continue_stack.pop()
-            self.break_stack.pop()
-
-        elif node.label == "Break":
-            if self.break_stack:
-                self.code.append(f"GOTO {self.break_stack[-1]}")
-
-        elif node.label == "Continue":
-            if self.continue_stack:
-                self.code.append(f"GOTO {self.continue_stack[-1]}")
-
-        elif node.label.startswith("Op("):
-            op = node.label[3:-1]
-            if op == "!":  # Unary not
-                expr = self.generate(node.children[0])
-                temp = self.new_temp()
-                self.code.append(f"{temp} = ! {expr}")
-                return temp
-            elif len(node.children) == 2:
-                left = self.generate(node.children[0])
-                right = self.generate(node.children[1])
-                temp = self.new_temp()
-                self.code.append(f"{temp} = {left} {op} {right}")
-                return temp
-            else:
-                # Should not happen, but fallback
-                return self.generate(node.children[0])
-
-        elif node.label.startswith("Number("):
-            return node.label[7:-1]
-
-        elif node.label.startswith("Var("):
-            return node.label[4:-1]
-
-        else:
-            for child in node.children:
-                self.generate(child)
+        return self.visit(node)
+
+    def visit_Program(self, node):
+        for fn in node.functions:
+            yield fn
+        return self.code
+
+    def visit_Function(self, node):
+        self.code.emit(FUNCTION, node.name)
+        for stmt in node.body:
+            yield stmt
+
+    def visit_VarDecl(self, node):
+        # Handle initialized variables
+        for child in node.declarators:
+            if isinstance(child, Init):
+                expr_temp = yield child.expr
+                self.code.emit(COPY, self.operands.intern(child.name), expr_temp)
+        # Declaration doesn't generate TAC for uninitialized
+
+    def visit_Assign(self, node):
+        expr_temp = yield node.expr
+        self.code.emit(COPY, self.operands.intern(node.name), expr_temp)
+
+    def visit_Return(self, node):
+        expr_temp = yield node.expr
+        self.code.emit(RETURN, None, expr_temp)
+
+    def visit_If(self, node):
+        cond = yield node.condition
+        else_label = self.new_label()
+        end_label = self.new_label()
+
+        self.code.emit(IFNOT, else_label, cond)
+        for stmt in node.then_body:
+            yield stmt
+        self.code.emit(GOTO, end_label)
+        self.code.emit(LABEL, else_label)
+        for stmt in node.else_body:
+            yield stmt
+        self.code.emit(LABEL, end_label)
+
+    def visit_While(self, node):
+        start_label = self.new_label()
+        end_label = self.new_label()
+        self.continue_stack.append(start_label)
+        self.break_stack.append(end_label)
+        self.code.emit(LABEL, start_label)
+        cond = yield node.condition
+        self.code.emit(IFNOT, end_label, cond)
+        for stmt in node.body:
+            yield stmt
+        self.code.emit(GOTO, start_label)
+        self.code.emit(LABEL, end_label)
+        self.continue_stack.pop()
+        self.break_stack.pop()
+
+    def visit_For(self, node):
+        start_label = self.new_label()
+        end_label = self.new_label()
+        update_label = self.new_label()
+        yield node.init
+        self.code.emit(LABEL, start_label)
+        cond_temp = yield node.condition
+        self.code.emit(IFNOT, end_label, cond_temp)
+        self.continue_stack.append(update_label)
+        self.break_stack.append(end_label)
+        for stmt in node.body:
+            yield stmt
+        self.code.emit(LABEL, update_label)
+        yield node.update
+        self.code.emit(GOTO, start_label)
+        self.code.emit(LABEL, end_label)
+        self.continue_stack.pop()
+        self.break_stack.pop()
+
+    def visit_Break(self, node):
+        if self.break_stack:
+            self.code.emit(GOTO, self.break_stack[-1])
+
+    def visit_Continue(self, node):
+        if self.continue_stack:
+            self.code.emit(GOTO, self.continue_stack[-1])
+
+    def visit_UnaryOp(self, node):  # Unary not
+        expr = yield node.operand
+        temp = self.new_temp()
+        self.code.emit(NOT, temp, expr)
+        return temp
+
+    def visit_BinOp(self, node):
+        left = yield node.left
+        right = yield node.right
+        temp = self.new_temp()
+        self.code.emit(BINARY_OPCODES[node.op], temp, left, right)
+        return temp
+
+    def visit_Number(self, node):
+        return parse_number(node.value)
+
+    def visit_Var(self, node):
+        return self.operands.intern(node.name)
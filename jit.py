@@ -0,0 +1,150 @@
+from tac import iter_rows, c_div, c_mod, FUNCTION, LABEL, COPY, NOT, IFNOT, GOTO, RETURN, ADD, SUB, MUL, DIV, MOD, AND, OR, EQ, NE, LT, GT, LE, GE
+
+# ---------- TAC -> Python compiler ----------
+# An execution backend for the same TAC simulate_return interprets. The code
+# is split into basic blocks, and blocks become Python functions generated
+# as source and built with a single compile() call. A block with a single
+# way in is inlined where it is entered (under an `if` for a branch target),
+# so only the entry, joins and loop headers get functions of their own. Every
+# name gets a slot in a list of values, so code is straight-line slot
+# arithmetic; a function returns the index of the block to run next.
+# Semantics match the interpreter: unknown names read as 0, division by
+# zero gives 0 and comparisons give 1 or 0.
+
+# Python expression templates over already-rendered operands
+EXPRESSIONS = {
+    ADD: "{a} + {b}", SUB: "{a} - {b}", MUL: "{a} * {b}",
+    DIV: "c_div({a}, {b})", MOD: "c_mod({a}, {b})",
+    AND: "1 if {a} and {b} else 0", OR: "1 if {a} or {b} else 0",
+    EQ: "1 if {a} == {b} else 0", NE: "1 if {a} != {b} else 0",
+    LT: "1 if {a} < {b} else 0", GT: "1 if {a} > {b} else 0",
+    LE: "1 if {a} <= {b} else 0", GE: "1 if {a} >= {b} else 0",
+}
+
+class CompiledProgram:
+    def __init__(self, tac_code):
+        self.slots = {}
+        rows = [row for row in iter_rows(tac_code) if row[0] != FUNCTION]
+
+        # Split into blocks: a label starts one, a jump or return ends one
+        blocks = []
+        labels = {}
+        current = []
+        for row in rows:
+            if row[0] == LABEL:
+                if current:
+                    blocks.append(current)
+                    current = []
+                labels[row[1]] = len(blocks)
+            else:
+                current.append(row)
+                if row[0] in (IFNOT, GOTO, RETURN):
+                    blocks.append(current)
+                    current = []
+        if current:
+            blocks.append(current)
+        # A label after the last instruction jumps to the end
+        self.end = len(blocks)
+
+        # Successor block indexes: (jump target or None, fall-through or None)
+        self.edges = []
+        preds = [0] * len(blocks)
+        for index, block in enumerate(blocks):
+            op, dest = block[-1][0], block[-1][1]
+            jump = self.target(labels, dest) if op in (IFNOT, GOTO) else None
+            fall = index + 1 if op not in (GOTO, RETURN) else None
+            self.edges.append((jump, fall))
+            for succ in (jump, fall):
+                if succ is not None and succ < len(blocks):
+                    preds[succ] += 1
+        # Blocks entered from exactly one place are inlined into the function
+        # of that place; the rest (the entry, joins, loop headers) are roots
+        self.inline = [count == 1 for count in preds]
+        if blocks:
+            self.inline[0] = False
+
+        source = []
+        roots = [index for index in range(len(blocks)) if not self.inline[index]]
+        while roots:
+            source.extend(self.function_source(roots.pop(), blocks, roots))
+        namespace = {"c_div": c_div, "c_mod": c_mod, "END": self.end, "inf": float("inf"), "nan": float("nan")}
+        exec(compile("\n".join(source), "<tac>", "exec"), namespace)
+        # Inlined blocks are never jumped to by index, so they need no entry
+        self.blocks = [namespace.get(f"block_{index}") for index in range(len(blocks))]
+        self.result_slot = len(self.slots)
+
+    def slot(self, name):
+        slot = self.slots.get(name)
+        if slot is None:
+            slot = self.slots[name] = len(self.slots)
+        return slot
+
+    def operand(self, value):
+        if type(value) is str:
+            return f"v[{self.slot(value)}]"
+        return repr(value)
+
+    def function_source(self, root, blocks, roots):
+        # One function for a root block and every block inlined into it. A
+        # conditional jump opens an `if` holding its target's code; the
+        # fall-through code follows at the outer indentation.
+        lines = [f"def block_{root}(v):"]
+        stack = [(root, 1)]
+        entered = False
+        while stack:
+            index, depth = stack.pop()
+            indent = "    " * depth
+            # A jump back to the root (a loop) returns to it like any other
+            if entered and (index == root or not self.inlined(index, depth, roots)):
+                lines.append(f"{indent}return {index}")
+                continue
+            entered = True
+            for op, dest, a, b in blocks[index]:
+                if op == COPY:
+                    lines.append(f"{indent}v[{self.slot(dest)}] = {self.operand(a)}")
+                elif op == NOT:
+                    lines.append(f"{indent}v[{self.slot(dest)}] = 0 if {self.operand(a)} else 1")
+                elif op in EXPRESSIONS:
+                    expression = EXPRESSIONS[op].format(a=self.operand(a), b=self.operand(b))
+                    lines.append(f"{indent}v[{self.slot(dest)}] = {expression}")
+                elif op == IFNOT:
+                    lines.append(f"{indent}if not {self.operand(a)}:")
+                elif op == RETURN:
+                    lines.append(f"{indent}v[-1] = {self.operand(a)}")
+                    lines.append(f"{indent}return END")
+            # (pushed last, so a jump target's code comes first, under its if)
+            jump, fall = self.edges[index]
+            if fall is not None:
+                stack.append((fall, depth))
+            if jump is not None:
+                stack.append((jump, depth + 1 if blocks[index][-1][0] == IFNOT else depth))
+        return lines
+
+    def inlined(self, index, depth, roots):
+        # Whether block `index` is emitted in place rather than returned to.
+        # Deep nesting is cut off, as Python limits how far code can be
+        # indented; the block becomes a root of its own instead.
+        if index >= self.end or not self.inline[index]:
+            return False
+        if depth >= 50:
+            self.inline[index] = False
+            roots.append(index)
+            return False
+        return True
+
+    def target(self, labels, label):
+        if label not in labels:
+            raise Exception(f"Undefined label: {label}")
+        return labels[label]
+
+    def run(self):
+        # Returns the value of the RETURN reached, or None if execution ran
+        # off the end of the code
+        values = [0] * (self.result_slot + 1)
+        values[-1] = None
+        blocks = self.blocks
+        end = self.end
+        block = 0
+        while block != end:
+            block = blocks[block](values)
+        return values[-1]
@@ -1,63 +1,206 @@
 import re
+from array import array
+
+# ---------- Token types ----------
+# Token types are small ints; TOKEN_NAMES maps them back for printing.
+NUMBER, ID, STRING, OP, SEMI, LPAREN, RPAREN, LBRACE, RBRACE, COMMA, KEYWORD = range(11)
+TOKEN_NAMES = ("NUMBER", "ID", "STRING", "OP", "SEMI", "LPAREN", "RPAREN", "LBRACE", "RBRACE", "COMMA", "KEYWORD")
+
+def line_column(source, offset):
+    # 1-based line and column of a source offset (str, bytes or mmap source).
+    # Columns count characters, so a UTF-8 source gives the same column as
+    # its decoded str.
+    newline = "\n" if isinstance(source, str) else b"\n"
+    if hasattr(source, "count"):
+        line = source.count(newline, 0, offset) + 1
+    else:
+        line = source[:offset].count(newline) + 1  # mmap has no count()
+    line_start = source.rfind(newline, 0, offset) + 1
+    if isinstance(source, str):
+        return line, offset - line_start + 1
+    # UTF-8 continuation bytes (0b10xxxxxx) do not start a character
+    return line, sum(1 for byte in source[line_start:offset] if byte & 0xC0 != 0x80) + 1
+
+def char_end(source, start):
+    # End offset of the character at start: one past it in a str, past its
+    # continuation bytes in a UTF-8 buffer
+    end = start + 1
+    if not isinstance(source, str):
+        while end < len(source) and source[end] & 0xC0 == 0x80:
+            end += 1
+    return end
+
+def source_text(source, start, end):
+    text = source[start:end]
+    if not isinstance(text, str):
+        text = text.decode("utf-8", "replace")  # bytes or mmap source
+    return text
 
 class Token:
-    def __init__(self, type_, value):
+    # A token is a (type, offset, length) view into the source; the text is
+    # only sliced out when .value is read.
+    __slots__ = ("type", "source", "offset", "length")
+
+    def __init__(self, type_, source, offset, length):
         self.type = type_
-        self.value = value
+        self.source = source
+        self.offset = offset
+        self.length = length
+
+    @property
+    def value(self):
+        return source_text(self.source, self.offset, self.offset + self.length)
+
+    @property
+    def name(self):
+        return TOKEN_NAMES[self.type]
+
+    @property
+    def line(self):
+        return line_column(self.source, self.offset)[0]
+
+    @property
+    def column(self):
+        return line_column(self.source, self.offset)[1]
 
     def __repr__(self):
-        return f"{self.type}({self.value})"
+        return f"{self.name}({self.value})"
+
+class TokenStore:
+    # Array-backed token list: one byte of type plus offset and length per
+    # token. Indexing and iteration hand out short-lived Token views.
+    __slots__ = ("source", "types", "offsets", "lengths")
+
+    def __init__(self, source):
+        self.source = source
+        self.types = array('B')
+        self.offsets = array('q')
+        self.lengths = array('I')
+
+    def append(self, token):
+        self.types.append(token.type)
+        self.offsets.append(token.offset)
+        self.lengths.append(token.length)
+
+    def extend(self, tokens):
+        for token in tokens:
+            self.append(token)
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        return Token(self.types[index], self.source, self.offsets[index], self.lengths[index])
+
+    def __iter__(self):
+        source = self.source
+        for type_, offset, length in zip(self.types, self.offsets, self.lengths):
+            yield Token(type_, source, offset, length)
+
+    def __repr__(self):
+        return repr(list(self))
+
+# ---------- Token table (built once at import time) ----------
+TOKEN_SPECIFICATION = [
+    ('NUMBER',   r'\d+(?:\.\d+)?'),
+    ('ID',       r'[A-Za-z_]\w*'),
+    ('STRING',   r'"(?:[^"\\]|\\.)*"'),
+    ('OP',       r'\+\+|--|==|!=|>=|<=|&&|\|\||[+\-*/%!=<>]'),
+    ('SEMI',     r';'),
+    ('LPAREN',   r'\('),
+    ('RPAREN',   r'\)'),
+    ('LBRACE',   r'\{'),
+    ('RBRACE',   r'\}'),
+    ('COMMA',    r','),
+    ('MISMATCH', r'[^ \t\n]')
+]
+
+# Whitespace and newlines are consumed as a prefix of every match instead of
+# being matched (and then thrown away) as tokens of their own. \w and \d
+# are ASCII-only, as in C, so the str pattern and its bytes copy below
+# accept the same language.
+TOKEN_REGEX = re.compile(r'[ \t\n]*(?:' + '|'.join(f'(?P<{name}>{pattern})' for name, pattern in TOKEN_SPECIFICATION) + ')',
+                         re.ASCII)
+
+# The same pattern over bytes, for lexing bytes/mmap sources without decoding them.
+TOKEN_REGEX_BYTES = re.compile(TOKEN_REGEX.pattern.encode("ascii"))
+
+KEYWORDS = frozenset({
+    'int', 'float', 'char', 'double', 'long', 'short', 'unsigned', 'signed', 'void',
+    'return', 'if', 'else', 'while', 'for', 'break', 'continue', 'do', 'switch', 'case', 'default',
+    'struct', 'union', 'enum', 'typedef', 'const', 'volatile', 'static', 'extern', 'auto', 'register',
+    'sizeof', 'goto'
+})
+KEYWORDS_BYTES = frozenset(keyword.encode("ascii") for keyword in KEYWORDS)
+
+# Group name -> emitted token type
+TOKEN_KINDS = {
+    'NUMBER': NUMBER,
+    'ID': ID,
+    'STRING': STRING,
+    'OP': OP,
+    'SEMI': SEMI,
+    'LPAREN': LPAREN,
+    'RPAREN': RPAREN,
+    'LBRACE': LBRACE,
+    'RBRACE': RBRACE,
+    'COMMA': COMMA,
+}
 
 class Lexer:
+    # source_code may be a str, or any bytes-like buffer such as an mmap, in
+    # which case the bytes pattern runs directly over the buffer.
     def __init__(self, source_code):
         self.source = source_code
-        self.tokens = []
+        self.tokens = TokenStore(source_code)
 
-    def tokenize(self):
-        token_specification = [
-            ('NUMBER',   r'\d+(\.\d+)?'),
-            ('ID',       r'[A-Za-z_]\w*'),
-            ('STRING',   r'"([^"\\]|\\.)*"'),
-            ('OP',       r'\+\+|--|==|!=|>=|<=|&&|\|\||[+\-*/%!=<>]'),
-            ('SEMI',     r';'),
-            ('LPAREN',   r'\('),
-            ('RPAREN',   r'\)'),
-            ('LBRACE',   r'\{'),
-            ('RBRACE',   r'\}'),
-            ('COMMA',    r','),
-            ('WHITESPACE', r'[ \t]+'),
-            ('NEWLINE',  r'\n'),
-            ('MISMATCH', r'.')
-        ]
-
-        token_regex = '|'.join(f'(?P<{name}>{pattern})' for name, pattern in token_specification)
-        keywords = {
-            'int', 'float', 'char', 'double', 'long', 'short', 'unsigned', 'signed', 'void',
-            'return', 'if', 'else', 'while', 'for', 'break', 'continue', 'do', 'switch', 'case', 'default',
-            'struct', 'union', 'enum', 'typedef', 'const', 'volatile', 'static', 'extern', 'auto', 'register',
-            'sizeof', 'goto'
-        }
-
-        for match in re.finditer(token_regex, self.source):
-            kind = match.lastgroup
-            value = match.group()
-
-            if kind == 'WHITESPACE' or kind == 'NEWLINE':
-                continue
-            elif kind == 'ID' and value in keywords:
-                self.tokens.append(Token("KEYWORD", value))
-            elif kind == 'ID':
-                self.tokens.append(Token("ID", value))
-            elif kind == 'NUMBER':
-                self.tokens.append(Token("NUMBER", value))
-            elif kind == 'STRING':
-                self.tokens.append(Token("STRING", value))
-            elif kind == 'OP':
-                self.tokens.append(Token("OP", value))
-            elif kind in {'SEMI', 'LPAREN', 'RPAREN', 'LBRACE', 'RBRACE', 'COMMA'}:
-                self.tokens.append(Token(kind, value))
-            elif kind == 'MISMATCH':
-                raise SyntaxError(f"Unexpected character: {value}")
-
-        return self.tokens
+    def patterns(self):
+        # (token regex, keyword set) for the source's type
+        if isinstance(self.source, str):
+            return TOKEN_REGEX, KEYWORDS
+        return TOKEN_REGEX_BYTES, KEYWORDS_BYTES
 
+    def mismatch(self, start):
+        source = self.source
+        line, column = line_column(source, start)
+        return SyntaxError(f"Unexpected character: {source_text(source, start, char_end(source, start))} "
+                           f"at line {line}, column {column}")
+
+    def iter_tokens(self):
+        # Lazily yield tokens so callers never need the whole token list in memory.
+        source = self.source
+        kinds = TOKEN_KINDS
+        regex, keywords = self.patterns()
+        for match in regex.finditer(source):
+            group = match.lastgroup
+            start, end = match.span(group)
+            if group == 'MISMATCH':
+                raise self.mismatch(start)
+            kind = kinds[group]
+            if kind == ID and source[start:end] in keywords:
+                kind = KEYWORD
+            yield Token(kind, source, start, end - start)
+
+    def tokenize(self):
+        # Same scan as iter_tokens, but each match goes straight into the
+        # TokenStore columns: building a Token only to copy its three fields
+        # out again was most of the per-token cost.
+        source = self.source
+        kinds = TOKEN_KINDS
+        regex, keywords = self.patterns()
+        store = self.tokens
+        add_type, add_offset, add_length = store.types.append, store.offsets.append, store.lengths.append
+        for match in regex.finditer(source):
+            group = match.lastgroup
+            start, end = match.span(group)
+            if group == 'MISMATCH':
+                raise self.mismatch(start)
+            kind = kinds[group]
+            if kind == ID and source[start:end] in keywords:
+                kind = KEYWORD
+            add_type(kind)
+            add_offset(start)
+            add_length(end - start)
+        return store
@@ -0,0 +1,237 @@
+from cfg import BasicBlock
+from dataflow import Liveness
+from tac import Instr, COPY, LABEL, IFNOT, GOTO, RETURN, ADD, SUB, MUL, defined, used
+
+# ---------- Loop optimizations ----------
+# Natural loops are found from back edges (an edge whose target dominates
+# its source). Each loop that gets optimized needs a preheader: a block
+# just before the header that every entry from outside the loop goes
+# through, either already there or a new labelled one. Invariant
+# computations are hoisted into it and multiplications of induction
+# variables are replaced by additions.
+
+class Loop:
+    # Header block plus the set of blocks in the loop body (header included)
+    __slots__ = ("header", "blocks")
+
+    def __init__(self, header, blocks):
+        self.header = header
+        self.blocks = blocks
+
+    def exits(self):
+        # (block in the loop, successor outside it) pairs
+        return [(block, succ) for block in self.blocks for succ in block.succs if succ not in self.blocks]
+
+    def __repr__(self):
+        return f"Loop({self.header!r}, {sorted(block.index for block in self.blocks)})"
+
+def find_loops(cfg):
+    # Natural loops, smallest (innermost) first; back edges into the same
+    # header are merged into one loop. Every back edge goes against reverse
+    # postorder, so without such retreating edges there is nothing to do.
+    position = {block.index: number for number, block in enumerate(cfg.reverse_postorder())}
+    retreating = [(block, succ) for block in cfg.blocks if block.index in position
+                  for succ in block.succs if position[succ.index] <= position[block.index]]
+    if not retreating:
+        return []
+    doms = cfg.dominators()
+    bodies = {}
+    for block, succ in retreating:
+        if doms[block.index] >> succ.index & 1:
+            body = bodies.setdefault(succ.index, {succ})
+            stack = [block]
+            while stack:
+                node = stack.pop()
+                if node not in body and node.index in position:
+                    body.add(node)
+                    stack.extend(node.preds)
+    loops = [Loop(cfg.blocks[index], body) for index, body in bodies.items()]
+    loops.sort(key=lambda loop: len(loop.blocks))
+    return loops
+
+class LoopOptimizer:
+    def __init__(self, cfg, new_temp, new_label):
+        # new_temp / new_label give unused names across the whole program
+        # (see Optimizer.name_sources), not just this function
+        self.cfg = cfg
+        instrs = cfg.instructions()
+        self.new_temp = new_temp
+        self.new_label = new_label
+        # Rewriting i * k as a running sum is only exact for ints
+        self.integers_only = not any(type(instr.a) is float or type(instr.b) is float for instr in instrs)
+        self.hoisted = 0
+        self.reduced = 0
+
+    def run(self):
+        # Loops are found once. All preheaders go in first, each new one
+        # joining the loops around its header, so that dominators and
+        # liveness are then computed once for every loop: moving code into a
+        # loop's preheader changes neither the control flow nor liveness at
+        # the headers and exits the other loops look at.
+        loops = find_loops(self.cfg)
+        preheaders = []
+        for loop in loops:
+            preheader = self.existing_preheader(loop)
+            if preheader is None and self.can_add_preheader(loop):
+                preheader = self.add_preheader(loop)
+                for other in loops:
+                    if other is not loop and loop.header in other.blocks:
+                        other.blocks.add(preheader)
+            if preheader is not None:
+                preheaders.append((loop, preheader))
+        if not preheaders:
+            return 0
+        liveness = Liveness(self.cfg)
+        for loop, preheader in preheaders:
+            self.hoist_invariants(loop, preheader, liveness)
+            self.reduce_strength(loop, preheader)
+        return self.hoisted + self.reduced
+
+    def existing_preheader(self, loop):
+        # The block just before the header already serves as one when it is
+        # the only way into the loop and simply falls through to the header
+        header = loop.header
+        outside = [pred for pred in header.preds if pred not in loop.blocks]
+        if len(outside) == 1:
+            block = outside[0]
+            if block.index == header.index - 1 and block.succs == [header] and block.terminator is None:
+                return block
+        return None
+
+    def can_add_preheader(self, loop):
+        # The header needs a label to retarget jumps to, and no block of the
+        # loop may fall through into it (it would fall into the preheader)
+        header = loop.header
+        if header.label is None:
+            return False
+        if header.index > 0:
+            previous = self.cfg.blocks[header.index - 1]
+            last = previous.instrs[-1] if previous.instrs else None
+            if previous in loop.blocks and (last is None or last.op not in (GOTO, RETURN)):
+                return False
+        return True
+
+    def add_preheader(self, loop):
+        header = loop.header
+        label = self.new_label()
+        for pred in header.preds:
+            last = pred.instrs[-1] if pred.instrs else None
+            if pred not in loop.blocks and last is not None and last.op in (GOTO, IFNOT) and last.dest == header.label:
+                pred.instrs[-1] = Instr(last.op, label, last.a, last.b)
+        preheader = BasicBlock(header.index, [Instr(LABEL, label)])
+        self.cfg.blocks.insert(header.index, preheader)
+        self.cfg.link()
+        return preheader
+
+    def hoist_invariants(self, loop, preheader, liveness):
+        # An assignment moves to the preheader when its operands are constants
+        # or names not assigned in the loop (or assigned only by hoisted
+        # code), it is the only assignment to its target in the loop, the
+        # target's old value is never read in the loop, and the target is dead
+        # after every exit the assignment's block does not dominate.
+        cfg = self.cfg
+        body = sorted(loop.blocks, key=lambda block: block.index)
+        assignments = {}
+        for block in body:
+            for instr in block.instrs:
+                dest = defined(instr)
+                if dest is not None:
+                    assignments[dest] = assignments.get(dest, 0) + 1
+        exits = loop.exits()
+        invariant = set()
+        moved = []
+        changed = True
+        while changed:
+            changed = False
+            for block in body:
+                kept = []
+                for instr in block.instrs:
+                    dest = defined(instr)
+                    if (dest is not None and assignments[dest] == 1 and dest not in invariant
+                            and all(name not in assignments or name in invariant for name in used(instr))
+                            and not liveness.live_at_entry(dest, loop.header)
+                            and all(cfg.dominates(block, exiting) or not liveness.live_at_entry(dest, target)
+                                    for exiting, target in exits)):
+                        moved.append(instr)
+                        invariant.add(dest)
+                        changed = True
+                    else:
+                        kept.append(instr)
+                block.instrs = kept
+        preheader.instrs.extend(moved)
+        self.hoisted += len(moved)
+
+    def reduce_strength(self, loop, preheader):
+        # For a basic induction variable i (assigned once in the loop, as
+        # i = i +/- c or through a temp computed that way just before) and an
+        # int constant k, i * k becomes a copy of a new temp that is set to
+        # i * k in the preheader and bumped by c * k right after i changes.
+        if not self.integers_only:
+            return
+        body = sorted(loop.blocks, key=lambda block: block.index)
+        sites = {}
+        for block in body:
+            for position, instr in enumerate(block.instrs):
+                dest = defined(instr)
+                if dest is not None:
+                    sites.setdefault(dest, []).append((block, position, instr))
+        steps = {}
+        for name, assigned in sites.items():
+            if len(assigned) == 1:
+                step = self.induction_step(name, assigned[0], sites)
+                if step is not None:
+                    steps[name] = (assigned[0][2], step)
+        if not steps:
+            return
+
+        temps = {}
+        updates = {}
+        for block in body:
+            instrs = []
+            for instr in block.instrs:
+                if instr.op == MUL:
+                    if instr.a in steps and type(instr.b) is int:
+                        variable, factor = instr.a, instr.b
+                    elif instr.b in steps and type(instr.a) is int:
+                        variable, factor = instr.b, instr.a
+                    else:
+                        variable = None
+                    if variable is not None and variable != instr.dest:
+                        temp = temps.get((variable, factor))
+                        if temp is None:
+                            temp = temps[variable, factor] = self.new_temp()
+                            preheader.instrs.append(Instr(MUL, temp, variable, factor))
+                            update, step = steps[variable]
+                            updates.setdefault(id(update), []).append(Instr(ADD, temp, temp, step * factor))
+                        instr = Instr(COPY, instr.dest, temp)
+                        self.reduced += 1
+                instrs.append(instr)
+            block.instrs = instrs
+        for block in body:
+            instrs = []
+            for instr in block.instrs:
+                instrs.append(instr)
+                instrs.extend(updates.get(id(instr), ()))
+            block.instrs = instrs
+
+    def induction_step(self, name, site, sites):
+        # Constant step of `name` if its one assignment in the loop is
+        # name = name +/- c, possibly as t = name +/- c; name = t
+        block, position, instr = site
+        if instr.op == COPY and type(instr.a) is str and len(sites.get(instr.a, ())) == 1:
+            temp_block, temp_position, temp_instr = sites[instr.a][0]
+            if temp_block is not block or temp_position > position:
+                return None
+            instr = temp_instr
+        if instr.op == ADD:
+            if instr.a == name and type(instr.b) is int:
+                return instr.b
+            if instr.b == name and type(instr.a) is int:
+                return instr.a
+        elif instr.op == SUB and instr.a == name and type(instr.b) is int:
+            return -instr.b
+        return None
+
+def optimize_loops(cfg, new_temp, new_label):
+    # Returns the number of instructions hoisted or strength-reduced
+    return LoopOptimizer(cfg, new_temp, new_label).run()
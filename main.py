@@ -1,22 +1,71 @@
+import argparse
+import json
+import mmap
+
 from lexer import Lexer
 from parser import Parser, print_ast_tree
 from semantic_analyzer import SemanticAnalyzer
 from intermediate import TACGenerator
-from optimizer import Optimizer
-from codegen import CodeGenerator
-from simulator import simulate_return  # ✅ Final Output in separate file
+from optimizer import Optimizer, PASSES, OPT_LEVELS, DEFAULT_OPT_LEVEL
+from codegen import CodeGenerator, REGISTERS
+from peephole import PeepholeOptimizer
+from assembler import assemble
+from simulator import simulate_return, Budget  # ✅ Final Output in separate file
+from vm import simulate_machine
 
 def print_section(title):
     print("\n" + "=" * len(title))
     print(title)
     print("=" * len(title))
 
-# =================== Load source code from test.c ===================
+# =================== Command line ===================
+arg_parser = argparse.ArgumentParser(description="Tiny Compiler")
+arg_parser.add_argument("source", nargs="?", default="test.c", help="C source file (default: test.c)")
+arg_parser.add_argument("--mmap", action="store_true",
+                        help="memory-map the source and lex the mapped bytes instead of reading it into a str")
+arg_parser.add_argument("-O", dest="opt_level", type=int, choices=sorted(OPT_LEVELS), default=DEFAULT_OPT_LEVEL,
+                        help=f"optimization level, -O0 to -O3 (default: -O{DEFAULT_OPT_LEVEL})")
+arg_parser.add_argument("--enable-pass", action="append", default=[], choices=list(PASSES), metavar="PASS",
+                        help="run an optimization pass the level leaves out (" + ", ".join(PASSES) + ")")
+arg_parser.add_argument("--disable-pass", action="append", default=[], choices=list(PASSES), metavar="PASS",
+                        help="skip an optimization pass the level would run")
+arg_parser.add_argument("--registers", type=int, default=len(REGISTERS), metavar="N",
+                        help=f"size of the register file R1..RN used from -O1 up; R1 is kept as scratch "
+                             f"(default: {len(REGISTERS)})")
+arg_parser.add_argument("-o", "--output", metavar="FILE",
+                        help="also assemble the generated code into a binary object file")
+arg_parser.add_argument("--backend", choices=("interpreter", "jit", "vm"), default="interpreter",
+                        help="run the final simulation by interpreting TAC, by compiling it to Python (jit) "
+                             "or by running the generated assembly on a register VM (vm)")
+arg_parser.add_argument("--profile", metavar="FILE",
+                        help="profile the interpreted simulation: print the TAC annotated with hit counts "
+                             "and write a JSON report to FILE")
+arg_parser.add_argument("--max-steps", type=int, metavar="N",
+                        help="stop the interpreted simulation after about N executed instructions")
+arg_parser.add_argument("--timeout", type=float, metavar="SECONDS",
+                        help="stop the interpreted simulation after SECONDS of wall-clock time")
+args = arg_parser.parse_args()
+if args.profile and args.backend != "interpreter":
+    arg_parser.error("--profile needs the interpreter backend")
+if (args.max_steps is not None or args.timeout is not None) and args.backend != "interpreter":
+    arg_parser.error("--max-steps and --timeout need the interpreter backend")
+if args.registers < 1:
+    arg_parser.error("--registers needs at least one register")
+
+# =================== Load source code ===================
 try:
-    with open("test.c", "r") as f:
-        source_code = f.read()
+    if args.mmap:
+        with open(args.source, "rb") as f:
+            # The mapping stays valid after the file is closed; an empty file cannot be mapped.
+            if f.seek(0, 2) == 0:
+                source_code = b""
+            else:
+                source_code = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    else:
+        with open(args.source, "r") as f:
+            source_code = f.read()
 except FileNotFoundError:
-    print("❌ test.c file not found.")
+    print(f"❌ {args.source} file not found.")
     exit()
 
 # =================== PHASE 1: LEXICAL ANALYSIS ===================
@@ -24,7 +73,7 @@ print_section("PHASE 1: Lexical Analysis")
 lexer = Lexer(source_code)
 tokens = lexer.tokenize()
 for token in tokens:
-    print(f"{token.type}: {token.value}")
+    print(f"{token.name}: {token.value}")
 
 # =================== PHASE 2: SYNTAX ANALYSIS / AST ===================
 print_section("PHASE 2: Syntax Analysis / AST Construction")
@@ -52,17 +101,41 @@ for line in tac_code:
 
 # =================== PHASE 5: OPTIMIZATION ===================
 print_section("PHASE 5: Optimization")
-optimizer = Optimizer(tac_code)
+optimizer = Optimizer(tac_code, args.opt_level, args.enable_pass, args.disable_pass)
 optimized_code = optimizer.optimize()
 for line in optimized_code:
     print(line)
+for line in optimizer.report():
+    print(line)
 
 # =================== PHASE 6: TARGET CODE GENERATION ===================
 print_section("PHASE 6: Target Code Generation")
-codegen = CodeGenerator(optimized_code)
+registers = tuple(f"R{number}" for number in range(1, args.registers + 1)) if args.opt_level > 0 else None
+codegen = CodeGenerator(optimized_code, registers)
 assembly = codegen.generate()
+if args.opt_level > 0:
+    peephole = PeepholeOptimizer(assembly)
+    assembly = peephole.optimize()
 for line in assembly:
     print(line)
+if args.opt_level > 0:
+    print(f"Peephole: saved {peephole.saved} instruction(s)")
+    print(f"Register allocation: {args.registers} register(s), {codegen.spilled} temp(s) spilled")
+if args.output:
+    obj = assemble(assembly)
+    obj.write(args.output)
+    print(f"Object file: {args.output} ({obj.size()} bytes, {len(obj)} instruction(s))")
 
 # =================== FINAL OUTPUT (Simulated Return) ===================
-simulate_return(tac_code)  # ✅ using simulator.py
+if args.backend == "vm":
+    simulate_machine(assembly)
+else:
+    budget = Budget(args.max_steps, args.timeout) if args.max_steps is not None or args.timeout is not None else None
+    profile = simulate_return(optimized_code, args.backend, bool(args.profile), budget)  # ✅ using simulator.py
+    if profile is not None:
+        print_section("Execution Profile")
+        for line in profile.listing():
+            print(line)
+        with open(args.profile, "w") as report:
+            json.dump(profile.report(), report, indent=2)
+        print(f"Profile: {profile.steps} step(s), report written to {args.profile}")
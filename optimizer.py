@@ -1,53 +1,155 @@
-import re
+from cfg import build_cfgs, flatten
+from cse import eliminate_common_subexpressions
+from dataflow import eliminate_dead_code
+from loops import optimize_loops
+from sccp import propagate_constants
+import time
+
+from tac import as_instrs, fresh_names
+
+# ---------- Pass manager ----------
+# Pass name -> Optimizer method, in the order passes run within a round
+PASSES = {
+    "sccp": "constant_propagation",
+    "dce": "dead_code_elimination",
+    "loops": "loop_optimization",
+    "cse": "common_subexpression_elimination",
+}
+
+# Level -> (passes, rounds). -O1 is the classic single round of folding and
+# DCE; higher levels repeat their passes until a round changes nothing.
+OPT_LEVELS = {
+    0: ((), 1),
+    1: (("sccp", "dce"), 1),
+    2: (("sccp", "dce", "cse"), 10),
+    3: (("sccp", "dce", "loops", "cse"), 10),
+}
+
+DEFAULT_OPT_LEVEL = 2
 
 class Optimizer:
-    def __init__(self, code_lines):
-        self.code = code_lines
+    def __init__(self, code_lines, level=DEFAULT_OPT_LEVEL, enable=(), disable=()):
+        if level not in OPT_LEVELS:
+            raise Exception(f"Unknown optimization level: {level}")
+        for name in list(enable) + list(disable):
+            if name not in PASSES:
+                raise Exception(f"Unknown optimization pass: {name}")
+        self.code = as_instrs(code_lines)
         self.optimized_code = []
+        self.cfgs = None
+        self.cse_report = {}
+        selected, self.max_rounds = OPT_LEVELS[level]
+        self.level = level
+        self.passes = [name for name in PASSES if (name in selected or name in enable) and name not in disable]
+        self.stats = {}
 
-    def constant_folding(self, line):
-        match = re.match(r'(t\d+) = (\d+) ([+\-*/]) (\d+)', line)
-        if match:
-            target, lhs, op, rhs = match.groups()
-            lhs, rhs = int(lhs), int(rhs)
-            result = eval(f"{lhs} {op} {rhs}")
-            return f"{target} = {result}  # constant folded"
-        return line
+    def build_cfgs(self):
+        # One control-flow graph per function over the current code; passes
+        # that rewrite the graphs store the result back with flatten_cfgs().
+        self.cfgs = build_cfgs(self.code)
+        return self.cfgs
 
-    def dead_code_elimination(self):
-        used_vars = set()
-        for line in self.code:
-            tokens = re.findall(r'\b\w+\b', line)
-            if '=' in line:
-                target = tokens[0]
-                expr = tokens[2:]
-                used_vars.update([tok for tok in expr if tok.startswith('t') or tok.isalpha()])
-            elif 'RETURN' in line or 'IF' in line or 'GOTO' in line:
-                used_vars.update([tok for tok in tokens[1:] if tok.startswith('t') or tok.isalpha()])
-
-        # Second pass: keep only used assignments or non-assign lines
-        new_code = []
-        for line in self.code:
-            if re.match(r'(t\d+) = .*', line):
-                target = line.split('=')[0].strip()
-                if target in used_vars:
-                    new_code.append(line)
-            else:
-                new_code.append(line)
-        self.code = new_code
+    def flatten_cfgs(self):
+        self.code = flatten(self.cfgs)
+        return self.code
 
-    def optimize(self):
-        # Pass 1: Constant folding
-        self.code = [self.constant_folding(line) for line in self.code]
+    def name_sources(self):
+        # (new_temp, new_label) giving names unused anywhere in the program.
+        # The simulator, jit and VM resolve names and labels program-wide,
+        # so a pass shares one pair across all the functions it rewrites.
+        return fresh_names(self.code).__next__, fresh_names(self.code, "L").__next__
+
+    def constant_propagation(self):
+        # Sparse conditional constant propagation, per function; returns the
+        # number of instructions folded or removed
+        changed = 0
+        for cfg in self.build_cfgs():
+            changed += propagate_constants(cfg)
+        self.flatten_cfgs()
+        return changed
 
-        # Pass 2: Dead code elimination
-        self.dead_code_elimination()
+    def loop_optimization(self):
+        # Loop-invariant code motion and strength reduction, per function;
+        # returns the number of instructions hoisted or reduced
+        changed = 0
+        new_temp, new_label = self.name_sources()
+        for cfg in self.build_cfgs():
+            changed += optimize_loops(cfg, new_temp, new_label)
+        self.flatten_cfgs()
+        return changed
 
+    def common_subexpression_elimination(self):
+        # Value numbering and global CSE, then removal of the copies and
+        # temps they added that are left unused (other dead stores are the
+        # dce pass's); returns the number of instructions removed per
+        # function (cse_report totals every run)
+        report = {}
+        new_temp = self.name_sources()[0]
+        for cfg in self.build_cfgs():
+            before = sum(len(block.instrs) for block in cfg.blocks)
+            created = set()
+            eliminate_common_subexpressions(cfg, new_temp, created)
+            eliminate_dead_code(cfg, created)
+            name = cfg.header.dest if cfg.header is not None else None
+            report[name] = report.get(name, 0) + before - sum(len(block.instrs) for block in cfg.blocks)
+        self.flatten_cfgs()
+        for name, removed in report.items():
+            self.cse_report[name] = self.cse_report.get(name, 0) + removed
+        return report
+
+    def dead_code_elimination(self):
+        # Liveness-based, per function; returns the number of instructions removed
+        removed = 0
+        for cfg in self.build_cfgs():
+            removed += eliminate_dead_code(cfg)
+        self.flatten_cfgs()
+        return removed
+
+    def run_pass(self, name):
+        # Run one pass over the whole program and add its timing and
+        # instruction delta to the statistics
+        before = len(self.code)
+        start = time.perf_counter()
+        getattr(self, PASSES[name])()
+        elapsed = time.perf_counter() - start
+        stats = self.stats["passes"].setdefault(name, {"runs": 0, "time": 0.0, "instructions_removed": 0})
+        stats["runs"] += 1
+        stats["time"] += elapsed
+        stats["instructions_removed"] += before - len(self.code)
+
+    def optimize(self):
+        # Run the selected passes in rounds until a round leaves the code
+        # unchanged (or the level's round limit is hit)
+        self.stats = {
+            "level": self.level,
+            "passes": {},
+            "rounds": 0,
+            "instructions_before": len(self.code),
+        }
+        for _ in range(self.max_rounds if self.passes else 0):
+            before = [(instr.op, instr.dest, instr.a, instr.b) for instr in self.code]
+            for name in self.passes:
+                self.run_pass(name)
+            self.stats["rounds"] += 1
+            if [(instr.op, instr.dest, instr.a, instr.b) for instr in self.code] == before:
+                break
+        self.stats["instructions_after"] = len(self.code)
         return self.code
 
+    def report(self):
+        # Printable per-pass statistics
+        lines = [f"-O{self.level}: {self.stats['instructions_before']} -> {self.stats['instructions_after']} "
+                 f"instructions in {self.stats['rounds']} round(s)"]
+        for name, stats in self.stats["passes"].items():
+            lines.append(f"  {name:<6} runs={stats['runs']:<3} time={stats['time'] * 1000:8.2f} ms  "
+                         f"removed={stats['instructions_removed']}")
+        for name, removed in self.cse_report.items():
+            lines.append(f"  CSE removed {removed} instruction(s) from {name}")
+        return lines
+
 if __name__ == "__main__":
     # Import from intermediate phase
-    from intermediate import IntermediateCodeGenerator
+    from intermediate import TACGenerator
     from parser import Parser
     from lexer import Lexer
 
@@ -61,9 +163,7 @@ if __name__ == "__main__":
     ast = parser.parse()
 
     # Intermediate Code Generation
-    icg = IntermediateCodeGenerator()
-    icg.generate(ast)
-    tac = icg.get_code()
+    tac = TACGenerator().generate(ast)
 
     print("Original TAC:")
     for line in tac:
@@ -74,3 +174,5 @@ if __name__ == "__main__":
     optimized = optimizer.optimize()
     for line in optimized:
         print(line)
+    for line in optimizer.report():
+        print(line)
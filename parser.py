@@ -1,33 +1,39 @@
-from lexer import Token
+from collections import deque
+from lexer import Token, TOKEN_NAMES, NUMBER, ID, OP, SEMI, LPAREN, RPAREN, LBRACE, RBRACE, COMMA, KEYWORD
 import sys
 
 # ---------- AST Node Classes ----------
-class ASTNode:
-    def __init__(self, label, children=None):
-        self.label = label
-        self.children = children or []
-
-    def __repr__(self):
-        return self.label
+from ast_nodes import (Program, Function, VarDecl, Init, Name, Assign, Return, If, While, For,
+                       Break, Continue, ExprStmt, BinOp, UnaryOp, Number, Var)
 
 # ---------- Parser Class ----------
 class Parser:
     def __init__(self, tokens):
-        self.tokens = tokens
-        self.pos = 0
-
-    def peek(self):
-        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+        # Any iterable of tokens works (a list, or Lexer.iter_tokens()); only a
+        # small lookahead buffer is kept instead of the full token list.
+        self.tokens = iter(tokens)
+        self.lookahead = deque()
+
+    def peek(self, offset=0):
+        lookahead = self.lookahead
+        while len(lookahead) <= offset:
+            token = next(self.tokens, None)
+            if token is None:
+                return None
+            lookahead.append(token)
+        return lookahead[offset]
 
     def advance(self):
-        self.pos += 1
+        if self.peek() is not None:
+            self.lookahead.popleft()
 
     def expect(self, token_type, value=None):
         token = self.peek()
         if not token:
             raise SyntaxError("Unexpected EOF")
         if token.type != token_type or (value and token.value != value):
-            raise SyntaxError(f"Expected {token_type} {value}, got {token.type} {token.value}")
+            raise SyntaxError(f"Expected {TOKEN_NAMES[token_type]} {value}, got {token.name} {token.value} "
+                              f"at line {token.line}, column {token.column}")
         self.advance()
         return token
 
@@ -45,283 +51,241 @@ class Parser:
         functions = []
         while self.peek():
             functions.append(self.parse_function())
-        return ASTNode("Program", functions)
+        return Program(functions)
 
     def parse_function(self):
-        self.expect("KEYWORD")        # return type
-        name = self.expect("ID").value
-        self.expect("LPAREN")
-        self.expect("RPAREN")
-        self.expect("LBRACE")
-
-        body = []
-        while self.peek() and self.peek().type != "RBRACE":
-            stmt = self.parse_statement()
-            if stmt:
-                body.append(stmt)
-
-        self.expect("RBRACE")
-        return ASTNode(f"Function({name})", body)
-
-    def parse_statement(self):
+        self.expect(KEYWORD)        # return type
+        name = self.expect(ID).value
+        self.expect(LPAREN)
+        self.expect(RPAREN)
+        self.expect(LBRACE)
+        body = self.parse_block()
+        return Function(name, body)
+
+    # Statements are parsed without recursion: every block opened by if /
+    # else / while / for is pushed on an explicit stack as a
+    # (kind, header, body) frame and turned into its node when its RBRACE is seen,
+    # so nesting depth is not limited by the Python stack.
+    def parse_block(self):
+        # Statements up to and including the RBRACE closing the current block
+        return self.parse_statements(("Block", None, []))
+
+    def parse_statements(self, frame):
+        stack = [frame]
+        while True:
+            token = self.peek()
+            if token is None:
+                raise SyntaxError("Unexpected EOF")
+            if token.type == RBRACE:
+                self.advance()
+                node = self.close_compound(stack.pop())
+                if isinstance(node, tuple):  # then-block followed by an else-block
+                    stack.append(node)
+                    continue
+                if not stack:
+                    return node
+                stack[-1][2].append(node)
+            elif token.type == KEYWORD and token.value in {"if", "while", "for"}:
+                stack.append(self.open_compound())
+            else:
+                stmt = self.parse_simple_statement()
+                if stmt:
+                    stack[-1][2].append(stmt)
+
+    def open_compound(self):
+        # Parse an if / while / for header up to its LBRACE and return the open block
+        keyword = self.expect(KEYWORD).value
+        self.expect(LPAREN)
+        if keyword == "for":
+            init = self.parse_assignment_expr()
+            self.expect(SEMI)
+            cond = self.parse_expression()
+            self.expect(SEMI)
+            update = self.parse_assignment_expr()
+            header = (init, cond, update)
+        else:
+            header = self.parse_expression()
+        self.expect(RPAREN)
+        self.expect(LBRACE)
+        kind = "Then" if keyword == "if" else keyword.capitalize()
+        return (kind, header, [])
+
+    def close_compound(self, frame):
+        kind, header, body = frame
+        if kind == "Block":
+            return body
+        if kind == "Then":
+            next_token = self.peek()
+            if next_token is not None and next_token.type == KEYWORD and next_token.value == "else":
+                self.expect(KEYWORD, "else")
+                self.expect(LBRACE)
+                return ("Else", (header, body), [])
+            return If(header, body, [])
+        if kind == "Else":
+            condition, then_body = header
+            return If(condition, then_body, body)
+        if kind == "While":
+            return While(header, body)
+        init, cond, update = header
+        return For(init, cond, update, body)
+
+    def parse_simple_statement(self):
         token = self.peek()
         if token is None:
             return None
-        if token.type == "KEYWORD" and token.value in {"int", "float", "char", "double", "long", "short", "unsigned", "signed"}:
+        if token.type == KEYWORD and token.value in {"int", "float", "char", "double", "long", "short", "unsigned", "signed"}:
             return self.parse_declaration()
-        elif token.type == "ID":
-            save_pos = self.pos
-            try:
+        elif token.type == ID:
+            next_token = self.peek(1)
+            if next_token is not None and next_token.type == OP and next_token.value == "=":
                 return self.parse_assignment()
-            except SyntaxError:
-                self.pos = save_pos
-                return self.parse_expression_statement()
-        elif token.type == "KEYWORD" and token.value == "if":
-            return self.parse_if_statement()
-        elif token.type == "KEYWORD" and token.value == "while":
-            return self.parse_while_statement()
-        elif token.type == "KEYWORD" and token.value == "for":
-            return self.parse_for_statement()
-        elif token.type == "KEYWORD" and token.value == "break":
+            return self.parse_expression_statement()
+        elif token.type == KEYWORD and token.value == "break":
             self.advance()
-            self.expect("SEMI")
-            return ASTNode("Break")
-        elif token.type == "KEYWORD" and token.value == "continue":
+            self.expect(SEMI)
+            return Break()
+        elif token.type == KEYWORD and token.value == "continue":
             self.advance()
-            self.expect("SEMI")
-            return ASTNode("Continue")
-        elif token.type == "KEYWORD" and token.value == "return":
+            self.expect(SEMI)
+            return Continue()
+        elif token.type == KEYWORD and token.value == "return":
             return self.parse_return()
         else:
             self.advance()
             return None
 
     def parse_declaration(self):
-        var_type = self.expect("KEYWORD").value
+        var_type = self.expect(KEYWORD).value
         names = []
         while True:
             id_token = self.peek()
-            if not id_token or id_token.type != "ID":
+            if not id_token or id_token.type != ID:
                 raise SyntaxError("Expected identifier in declaration")
-            name = self.expect("ID").value
+            name = self.expect(ID).value
             # Support optional initialization
             next_token = self.peek()
-            if next_token is not None and next_token.type == "OP" and next_token.value == "=":
-                self.expect("OP", "=")
+            if next_token is not None and next_token.type == OP and next_token.value == "=":
+                self.expect(OP, "=")
                 expr = self.parse_expression()
-                names.append(ASTNode("Init", [ASTNode(name), expr]))
+                names.append(Init(name, expr))
             else:
-                names.append(ASTNode(name))
+                names.append(Name(name))
             next_token = self.peek()
-            if next_token is not None and next_token.type == "COMMA":
+            if next_token is not None and next_token.type == COMMA:
                 self.advance()
             else:
                 break
-        self.expect("SEMI")
-        return ASTNode("VarDecl", [ASTNode(var_type)] + names)
+        self.expect(SEMI)
+        return VarDecl(var_type, names)
 
     def parse_assignment(self):
         id_token = self.peek()
-        if not id_token or id_token.type != "ID":
+        if not id_token or id_token.type != ID:
             raise SyntaxError("Expected identifier in assignment")
-        name = self.expect("ID").value
-        self.expect("OP", "=")
+        name = self.expect(ID).value
+        self.expect(OP, "=")
         expr = self.parse_expression()
-        self.expect("SEMI")
-        return ASTNode("Assign", [ASTNode(name), expr])
+        self.expect(SEMI)
+        return Assign(name, expr)
 
     def parse_assignment_expr(self):
         id_token = self.peek()
-        if not id_token or id_token.type != "ID":
+        if not id_token or id_token.type != ID:
             raise SyntaxError("Expected identifier in assignment expression")
-        name = self.expect("ID").value
-        self.expect("OP", "=")
+        name = self.expect(ID).value
+        self.expect(OP, "=")
         expr = self.parse_expression()
-        return ASTNode("Assign", [ASTNode(name), expr])
+        return Assign(name, expr)
 
     def parse_return(self):
-        self.expect("KEYWORD", "return")
+        self.expect(KEYWORD, "return")
         expr = self.parse_expression()
-        self.expect("SEMI")
-        return ASTNode("Return", [expr])
-
-    def parse_if_statement(self):
-        self.expect("KEYWORD", "if")
-        self.expect("LPAREN")
-        condition = self.parse_expression()
-        self.expect("RPAREN")
-        self.expect("LBRACE")
-        then_body = []
-        while True:
-            next_token = self.peek()
-            if next_token is not None and next_token.type != "RBRACE":
-                then_body.append(self.parse_statement())
-            else:
-                break
-        self.expect("RBRACE")
-
-        else_body = []
-        next_token = self.peek()
-        if next_token is not None and next_token.type == "KEYWORD" and next_token.value == "else":
-            self.expect("KEYWORD", "else")
-            self.expect("LBRACE")
-            while True:
-                next_token = self.peek()
-                if next_token is not None and next_token.type != "RBRACE":
-                    else_body.append(self.parse_statement())
-                else:
-                    break
-            self.expect("RBRACE")
-
-        children = [ASTNode("Condition", [condition]), ASTNode("Then", then_body)]
-        if else_body:
-            children.append(ASTNode("Else", else_body))
-        return ASTNode("If", children)
-
-    def parse_while_statement(self):
-        self.expect("KEYWORD", "while")
-        self.expect("LPAREN")
-        condition = self.parse_expression()
-        self.expect("RPAREN")
-        self.expect("LBRACE")
-        body = []
-        while True:
-            next_token = self.peek()
-            if next_token is not None and next_token.type != "RBRACE":
-                body.append(self.parse_statement())
-            else:
-                break
-        self.expect("RBRACE")
-        return ASTNode("While", [ASTNode("Condition", [condition]), ASTNode("Body", body)])
-
-    def parse_for_statement(self):
-        self.expect("KEYWORD", "for")
-        self.expect("LPAREN")
-        init = self.parse_assignment_expr()
-        self.expect("SEMI")
-        cond = self.parse_expression()
-        self.expect("SEMI")
-        update = self.parse_assignment_expr()
-        self.expect("RPAREN")
-        self.expect("LBRACE")
-        body = []
-        while True:
-            next_token = self.peek()
-            if next_token is not None and next_token.type != "RBRACE":
-                body.append(self.parse_statement())
-            else:
-                break
-        self.expect("RBRACE")
-        return ASTNode("For", [init, ASTNode("Condition", [cond]), update, ASTNode("Body", body)])
+        self.expect(SEMI)
+        return Return(expr)
 
     def parse_expression_statement(self):
         expr = self.parse_expression()
-        self.expect("SEMI")
-        return ASTNode("ExprStmt", [expr])
+        self.expect(SEMI)
+        return ExprStmt(expr)
 
     # Operator precedence: ||, &&, == !=, < > <= >=, + -, * / %, unary !
+    # Expressions are parsed by precedence climbing over explicit operand and
+    # operator stacks; "(" and unary "!" sit on the operator stack as markers.
     def parse_expression(self):
-        return self.parse_or()
-
-    def parse_or(self):
-        left = self.parse_and()
-        while True:
-            token = self.peek()
-            if token is not None and token.type == "OP" and token.value == "||":
-                op = self.expect("OP").value
-                right = self.parse_and()
-                left = ASTNode(f"Op({op})", [left, right])
+        operands = []
+        operators = []
+        depth = 0  # open parentheses inside this expression
+
+        def reduce():
+            op = operators.pop()
+            if op == "!":
+                operands.append(UnaryOp(op, operands.pop()))
             else:
-                break
-        return left
-
-    def parse_and(self):
-        left = self.parse_equality()
-        while True:
-            token = self.peek()
-            if token is not None and token.type == "OP" and token.value == "&&":
-                op = self.expect("OP").value
-                right = self.parse_equality()
-                left = ASTNode(f"Op({op})", [left, right])
-            else:
-                break
-        return left
-
-    def parse_equality(self):
-        left = self.parse_relational()
-        while True:
-            token = self.peek()
-            if token is not None and token.type == "OP" and token.value in {"==", "!="}:
-                op = self.expect("OP").value
-                right = self.parse_relational()
-                left = ASTNode(f"Op({op})", [left, right])
-            else:
-                break
-        return left
-
-    def parse_relational(self):
-        left = self.parse_additive()
-        while True:
-            token = self.peek()
-            if token is not None and token.type == "OP" and token.value in {"<", ">", "<=", ">="}:
-                op = self.expect("OP").value
-                right = self.parse_additive()
-                left = ASTNode(f"Op({op})", [left, right])
-            else:
-                break
-        return left
+                right = operands.pop()
+                operands.append(BinOp(op, operands.pop(), right))
 
-    def parse_additive(self):
-        left = self.parse_term()
         while True:
+            # Operand position: prefix operators, "(" or a primary
             token = self.peek()
-            if token is not None and token.type == "OP" and token.value in {"+", "-"}:
-                op = self.expect("OP").value
-                right = self.parse_term()
-                left = ASTNode(f"Op({op})", [left, right])
+            if not token:
+                raise SyntaxError("Unexpected end of input in expression")
+            if token.type == OP and token.value == "!":
+                self.advance()
+                operators.append("!")
+                continue
+            if token.type == LPAREN:
+                self.advance()
+                operators.append("(")
+                depth += 1
+                continue
+            if token.type == NUMBER:
+                operands.append(Number(token.value))
+            elif token.type == ID:
+                operands.append(Var(token.value))
             else:
-                break
-        return left
+                raise SyntaxError(f"Unexpected token in expression: {token} at line {token.line}, column {token.column}")
+            self.advance()
 
-    def parse_term(self):
-        left = self.parse_factor()
-        while True:
-            token = self.peek()
-            if token is not None and token.type == "OP" and token.value in {"*", "/", "%"}:
-                op = self.expect("OP").value
-                right = self.parse_factor()
-                left = ASTNode(f"Op({op})", [left, right])
-            else:
+            # Operator position: closing parentheses, then a binary operator or the end
+            while True:
+                token = self.peek()
+                if token is not None and token.type == RPAREN and depth:
+                    self.advance()
+                    while operators[-1] != "(":
+                        reduce()
+                    operators.pop()
+                    depth -= 1
+                    continue
+                precedence = BINARY_PRECEDENCE.get(token.value) if token is not None and token.type == OP else None
+                if precedence is None:
+                    if depth:
+                        self.expect(RPAREN)
+                    while operators:
+                        reduce()
+                    return operands[0]
+                while operators and operators[-1] != "(" and (operators[-1] == "!" or BINARY_PRECEDENCE[operators[-1]] >= precedence):
+                    reduce()
+                operators.append(token.value)
+                self.advance()
                 break
-        return left
 
-    def parse_factor(self):
-        token = self.peek()
-        if not token:
-            raise SyntaxError("Unexpected end of input in expression")
-        if token.type == "OP" and token.value == "!":
-            self.advance()
-            expr = self.parse_factor()
-            return ASTNode("Op(!)", [expr])
-        elif token.type == "NUMBER":
-            self.advance()
-            return ASTNode(f"Number({token.value})")
-        elif token.type == "ID":
-            self.advance()
-            return ASTNode(f"Var({token.value})")
-        elif token.type == "LPAREN":
-            self.expect("LPAREN")
-            expr = self.parse_expression()
-            self.expect("RPAREN")
-            return expr
-        else:
-            raise SyntaxError(f"Unexpected token in expression: {token}")
+BINARY_PRECEDENCE = {
+    "||": 1,
+    "&&": 2,
+    "==": 3, "!=": 3,
+    "<": 4, ">": 4, "<=": 4, ">=": 4,
+    "+": 5, "-": 5,
+    "*": 6, "/": 6, "%": 6,
+}
 
 # ---------- AST Tree Printer ----------
 def print_ast_tree(node, indent=""):
-    print(indent + str(node.label))
-    for child in node.children:
-        print_ast_tree(child, indent + "  ")
+    stack = [(node, indent)]
+    while stack:
+        node, indent = stack.pop()
+        print(indent + str(node.label))
+        child_indent = indent + "  "
+        stack.extend((child, child_indent) for child in reversed(node.children))
 
 # ---------- Run Example ----------
 if __name__ == "__main__":
@@ -0,0 +1,182 @@
+# ---------- Peephole optimizer over generated assembly ----------
+# Works on CodeGenerator output lines: "label:", "; comment" and
+# "OP dst, src" instructions. Comments mark function entries, so like labels
+# they end a straight-line window. Rules run until none of them applies:
+#   * jump threading: a jump to a label that only jumps on goes straight to
+#     the final target;
+#   * unreachable code after JMP / RET up to the next label is dropped;
+#   * redundant moves: MOV a, a, and any MOV of a value into a register
+#     or name already known to hold it within the window;
+#   * a JMP (or CMP / JE pair) to a label that follows immediately.
+
+JUMPS = ("JMP", "JE")
+
+def is_label(line):
+    return line.endswith(":") and not line.startswith(";")
+
+def is_instruction(line):
+    return bool(line) and not line.startswith(";") and not is_label(line)
+
+def split_instr(line):
+    # "MOV R1, x" -> ("MOV", ["R1", "x"])
+    op, _, rest = line.partition(" ")
+    return op, [operand.strip() for operand in rest.split(",")] if rest else []
+
+def is_register(operand):
+    return operand[:1] == "R" and operand[1:].isdigit()
+
+def forget(holds, operand):
+    # operand is about to change: drop what is known about it
+    holds.pop(operand, None)
+    for values in holds.values():
+        values.discard(operand)
+
+def count_instructions(asm):
+    return sum(1 for line in asm if is_instruction(line))
+
+class PeepholeOptimizer:
+    def __init__(self, asm):
+        self.asm = list(asm)
+        self.saved = 0
+
+    def optimize(self):
+        before = count_instructions(self.asm)
+        changed = True
+        while changed:
+            changed = False
+            for rule in (self.thread_jumps, self.remove_unreachable,
+                         self.remove_redundant_moves, self.remove_jumps_to_next):
+                if rule():
+                    changed = True
+        self.saved = before - count_instructions(self.asm)
+        return self.asm
+
+    def thread_jumps(self):
+        # Label -> label its first instruction jumps to unconditionally
+        forwards = {}
+        pending = []
+        for line in self.asm:
+            if is_label(line):
+                pending.append(line[:-1])
+            elif is_instruction(line):
+                op, operands = split_instr(line)
+                if op == "JMP":
+                    for label in pending:
+                        forwards[label] = operands[0]
+                pending = []
+            else:
+                pending = []
+        if not forwards:
+            return False
+
+        # Every label on a chain gets the chain's end, so each is walked once.
+        # In a cycle of jumps, the label closing the cycle stands for it.
+        finals = {}
+
+        def final(label):
+            path = []
+            seen = set()
+            while label in forwards and label not in finals and label not in seen:
+                seen.add(label)
+                path.append(label)
+                label = forwards[label]
+            target = finals.get(label, label)
+            for name in path:
+                finals[name] = target
+            return target
+
+        changed = False
+        for index, line in enumerate(self.asm):
+            if is_instruction(line):
+                op, operands = split_instr(line)
+                if op in JUMPS and operands[0] in forwards:
+                    target = final(operands[0])
+                    if target != operands[0]:
+                        self.asm[index] = f"{op} {target}"
+                        changed = True
+        return changed
+
+    def remove_unreachable(self):
+        kept = []
+        reachable = True
+        for line in self.asm:
+            if not is_instruction(line):
+                reachable = True
+            elif not reachable:
+                continue
+            elif split_instr(line)[0] in ("JMP", "RET"):
+                reachable = False
+            kept.append(line)
+        changed = len(kept) != len(self.asm)
+        self.asm = kept
+        return changed
+
+    def remove_redundant_moves(self):
+        # Within a straight-line window, track which names and constants each
+        # register is known to hold; a MOV that copies a value to where it
+        # already is goes away
+        kept = []
+        holds = {}
+        for line in self.asm:
+            if not is_instruction(line):
+                holds = {}
+                kept.append(line)
+                continue
+            op, operands = split_instr(line)
+            if op == "MOV":
+                dst, src = operands
+                if dst == src:
+                    continue
+                if is_register(dst):
+                    if src in holds.get(dst, ()):
+                        continue
+                    values = {src} | holds.get(src, set())
+                    forget(holds, dst)
+                    holds[dst] = values
+                else:
+                    if dst in holds.get(src, ()):
+                        continue
+                    forget(holds, dst)
+                    if is_register(src):
+                        holds.setdefault(src, set()).add(dst)
+            elif op in ("CMP", "JE"):
+                pass
+            elif operands and is_register(operands[0]):
+                forget(holds, operands[0])
+            else:
+                holds = {}
+            kept.append(line)
+        changed = len(kept) != len(self.asm)
+        self.asm = kept
+        return changed
+
+    def remove_jumps_to_next(self):
+        # Walks backwards, so `following` holds the labels directly after
+        # the current line in the output being built: dropping a jump makes
+        # the labels after it follow the line before it, and a whole chain
+        # of jumps to next labels goes in one pass
+        kept = []
+        following = set()
+        drop_cmp = False
+        changed = False
+        for line in reversed(self.asm):
+            if is_label(line):
+                following.add(line[:-1])
+                kept.append(line)
+                continue
+            if is_instruction(line):
+                op, operands = split_instr(line)
+                if op in JUMPS and operands[0] in following:
+                    changed = True
+                    # The CMP only sets flags for this JE
+                    drop_cmp = drop_cmp or op == "JE"
+                    continue
+                if drop_cmp and op == "CMP":
+                    drop_cmp = False
+                    continue
+            drop_cmp = False
+            following = set()
+            kept.append(line)
+        kept.reverse()
+        self.asm = kept
+        return changed
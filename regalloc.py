@@ -0,0 +1,81 @@
+from bisect import insort
+
+from dataflow import Liveness
+from tac import ASSIGNMENTS, is_temp
+
+# ---------- Linear-scan register allocation ----------
+# Only compiler temps (t1, t2, ...) get registers; program variables stay in
+# memory by name. A temp's live interval runs from its first to its last
+# mention in layout order, stretched over every block it is live into or
+# out of. Intervals are handed registers in order of their start; when none
+# is free, the interval that ends last is spilled, i.e. left in memory.
+
+class LiveInterval:
+    __slots__ = ("name", "start", "end", "register")
+
+    def __init__(self, name, start):
+        self.name = name
+        self.start = start
+        self.end = start
+        self.register = None
+
+    def __repr__(self):
+        return f"{self.name}[{self.start}, {self.end}] -> {self.register or 'memory'}"
+
+def live_intervals(cfg):
+    liveness = Liveness(cfg)
+    # Only the temps among the names live across blocks matter
+    temp_bits = 0
+    for name, index in liveness.var_index.items():
+        if is_temp(name):
+            temp_bits |= 1 << index
+
+    # Positions only grow in layout order, so a name's first mention starts
+    # its interval and its latest mention ends it
+    starts = {}
+    ends = {}
+    position = 0
+    for block in cfg.blocks:
+        if not block.instrs:
+            continue
+        for name in liveness.names(liveness.live_in[block.index] & temp_bits):
+            starts.setdefault(name, position)
+            ends[name] = position
+        for instr in block.instrs:
+            # (operands and assigned name; label names are not operands)
+            for name in (instr.a, instr.b, instr.dest if instr.op in ASSIGNMENTS else None):
+                if type(name) is str:
+                    starts.setdefault(name, position)
+                    ends[name] = position
+            position += 1
+        for name in liveness.names(liveness.live_out[block.index] & temp_bits):
+            ends[name] = position - 1
+    intervals = []
+    for name, start in starts.items():
+        if is_temp(name):
+            interval = LiveInterval(name, start)
+            interval.end = ends[name]
+            intervals.append(interval)
+    return intervals
+
+def allocate_registers(cfg, registers):
+    # Returns ({temp: register}, [spilled temps]); spilled temps stay in memory.
+    # An interval ending where another starts may pass its register on: the
+    # instruction reads the old temp before it writes the new one.
+    intervals = live_intervals(cfg)
+    free = list(reversed(registers))
+    active = []    # intervals holding a register, by end
+    for interval in intervals:
+        while active and active[0].end <= interval.start:
+            free.append(active.pop(0).register)
+        if free:
+            interval.register = free.pop()
+        elif active and active[-1].end > interval.end:
+            spilled = active.pop()
+            interval.register = spilled.register
+            spilled.register = None
+        else:
+            continue
+        insort(active, interval, key=lambda interval: interval.end)
+    location = {interval.name: interval.register for interval in intervals if interval.register is not None}
+    return location, [interval.name for interval in intervals if interval.register is None]
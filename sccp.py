@@ -0,0 +1,167 @@
+from dataflow import Liveness
+from tac import Instr, EVALUATE, ASSIGNMENTS, c_not, is_constant, COPY, NOT, AND, OR, MUL, IFNOT, GOTO, RETURN
+
+# ---------- Sparse conditional constant propagation ----------
+# Runs over one function's CFG. Every name starts out as the constant 0
+# (what the simulator reads for a variable that was never assigned), a
+# name becomes NAC ("not a constant") once two executable paths disagree
+# about it, and only edges that can actually be taken -- given the
+# constants known so far -- are followed. Afterwards constant operands are
+# substituted, constant expressions are folded to copies, constant branches
+# become GOTOs or fall-throughs, and blocks that were never executed are
+# removed. Only names live on a block boundary are carried between blocks.
+
+NAC = object()
+
+def value_of(operand, state):
+    return state.get(operand, 0) if type(operand) is str else operand
+
+def evaluate(instr, state):
+    # Lattice value of an assignment's right-hand side
+    op = instr.op
+    a = value_of(instr.a, state)
+    if op == COPY:
+        return a
+    if op == NOT:
+        return NAC if a is NAC else c_not(a)
+    b = value_of(instr.b, state)
+    if a is NAC or b is NAC:
+        # A known operand can still decide the result
+        known = b if a is NAC else a
+        if known is NAC:
+            return NAC
+        if op == AND and not known:
+            return 0
+        if op == OR and known:
+            return 1
+        if op == MUL and known == 0 and type(known) is int:
+            return 0
+        return NAC
+    return EVALUATE[op](a, b)
+
+def same_value(x, y):
+    return x is y or (x is not NAC and y is not NAC and type(x) is type(y) and x == y)
+
+class ConstantPropagation:
+    def __init__(self, cfg):
+        self.cfg = cfg
+        liveness = Liveness(cfg)
+        self.live_in = [liveness.names(bits) for bits in liveness.live_in]
+        self.live_out = [liveness.names(bits) for bits in liveness.live_out]
+        self.out_states = [None] * len(cfg.blocks)  # None: block not executed yet
+        self.edges = set()                           # executable (pred, succ) index pairs
+
+    def in_state(self, block):
+        sources = [self.out_states[pred.index] for pred in block.preds
+                   if (pred.index, block.index) in self.edges]
+        if block is self.cfg.entry:
+            sources.append({})  # function entry: everything is 0
+        state = {}
+        for name in self.live_in[block.index]:
+            value = None
+            for source in sources:
+                incoming = source.get(name, 0)
+                if value is None:
+                    value = incoming
+                elif not same_value(value, incoming):
+                    value = NAC
+                    break
+            state[name] = value
+        return state
+
+    def taken_successors(self, block, state):
+        last = block.instrs[-1] if block.instrs else None
+        if last is not None and last.op == IFNOT:
+            cond = value_of(last.a, state)
+            target = self.cfg.label_blocks.get(last.dest)
+            fallthrough = [succ for succ in block.succs if succ is not target]
+            if cond is NAC:
+                return block.succs
+            if cond:
+                return fallthrough or [target]
+            return [target] if target is not None else []
+        return block.succs
+
+    def solve(self):
+        entry = self.cfg.entry
+        if entry is None:
+            return
+        worklist = [entry]
+        while worklist:
+            block = worklist.pop()
+            state = self.in_state(block)
+            for instr in block.instrs:
+                if instr.op in ASSIGNMENTS:
+                    state[instr.dest] = evaluate(instr, state)
+            out = {name: state.get(name, 0) for name in self.live_out[block.index]}
+            changed = self.out_states[block.index] is None or any(
+                not same_value(value, self.out_states[block.index][name]) for name, value in out.items())
+            self.out_states[block.index] = out
+            for succ in self.taken_successors(block, state):
+                edge = (block.index, succ.index)
+                if edge not in self.edges:
+                    self.edges.add(edge)
+                    worklist.append(succ)
+                elif changed:
+                    worklist.append(succ)
+
+    def rewrite(self):
+        # Apply the solution; returns the number of instructions changed or removed
+        changes = 0
+        kept_blocks = []
+        for block in self.cfg.blocks:
+            if self.out_states[block.index] is None:
+                changes += len(block.instrs)
+                continue
+            state = self.in_state(block)
+            instrs = []
+            for instr in block.instrs:
+                new = instr
+                op = instr.op
+                if op in ASSIGNMENTS:
+                    value = evaluate(instr, state)
+                    state[instr.dest] = value
+                    if value is not NAC:
+                        if not (op == COPY and is_constant(instr.a)):
+                            new = Instr(COPY, instr.dest, value)
+                    else:
+                        new = substitute(instr, state)
+                elif op == IFNOT:
+                    cond = value_of(instr.a, state)
+                    if cond is NAC:
+                        new = substitute(instr, state)
+                    elif cond:
+                        changes += 1
+                        continue
+                    else:
+                        new = Instr(GOTO, instr.dest)
+                elif op == RETURN:
+                    new = substitute(instr, state)
+                if new is not instr:
+                    changes += 1
+                instrs.append(new)
+            block.instrs = instrs
+            kept_blocks.append(block)
+        self.cfg.blocks = kept_blocks
+        self.cfg.link()
+        return changes
+
+def substitute(instr, state):
+    # Replace names that hold known constants by the constants themselves
+    a, b = instr.a, instr.b
+    if type(a) is str:
+        value = state.get(a, 0)
+        if value is not NAC:
+            a = value
+    if type(b) is str:
+        value = state.get(b, 0)
+        if value is not NAC:
+            b = value
+    if a is instr.a and b is instr.b:
+        return instr
+    return Instr(instr.op, instr.dest, a, b)
+
+def propagate_constants(cfg):
+    propagation = ConstantPropagation(cfg)
+    propagation.solve()
+    return propagation.rewrite()
@@ -1,62 +1,70 @@
-class SemanticAnalyzer:
+from visitor import NodeVisitor
+
+class SemanticAnalyzer(NodeVisitor):
     def __init__(self):
         self.symbol_table = set()
 
     def analyze(self, node):
-        if node.label == "Program":
-            for child in node.children:
-                self.analyze(child)
-
-        elif node.label.startswith("Function"):
-            self.symbol_table = set()
-            for stmt in node.children:
-                self.analyze(stmt)
-
-        elif node.label == "VarDecl":
-            var_type = node.children[0].label
-            for child in node.children[1:]:
-                if child.label == "Init":
-                    var_name = child.children[0].label
-                else:
-                    var_name = child.label
-                if var_name in self.symbol_table:
-                    raise Exception(f"Semantic Error: Variable '{var_name}' already declared.")
-                self.symbol_table.add(var_name)
-
-        elif node.label == "Assign":
-            var_name = node.children[0].label
-            if var_name not in self.symbol_table:
-                raise Exception(f"Semantic Error: Variable '{var_name}' not declared before assignment.")
-            self.analyze(node.children[1])  # expression
-
-        elif node.label == "Return":
-            self.analyze(node.children[0])
-
-        elif node.label == "If":
-            for child in node.children:
-                self.analyze(child)
-
-        elif node.label == "While":
-            for child in node.children:
-                self.analyze(child)
-
-        elif node.label == "Then" or node.label == "Else" or node.label == "Body" or node.label == "Condition":
-            for stmt in node.children:
-                self.analyze(stmt)
-
-        elif node.label.startswith("Op("):
-            self.analyze(node.children[0])
-            self.analyze(node.children[1])
-
-        elif node.label.startswith("Var("):
-            var_name = node.label[4:-1]
-            if var_name not in self.symbol_table:
-                raise Exception(f"Semantic Error: Variable '{var_name}' used before declaration.")
-
-        elif node.label.startswith("Number("):
-            pass  # constants are okay
-
-        else:
-            # For future node types
-            for child in node.children:
-                self.analyze(child)
+        return self.visit(node)
+
+    def visit_Program(self, node):
+        for child in node.functions:
+            yield child
+
+    def visit_Function(self, node):
+        self.symbol_table = set()
+        for stmt in node.body:
+            yield stmt
+
+    def visit_VarDecl(self, node):
+        for child in node.declarators:
+            var_name = child.name
+            if var_name in self.symbol_table:
+                raise Exception(f"Semantic Error: Variable '{var_name}' already declared.")
+            self.symbol_table.add(var_name)
+
+    def visit_Assign(self, node):
+        var_name = node.name
+        if var_name not in self.symbol_table:
+            raise Exception(f"Semantic Error: Variable '{var_name}' not declared before assignment.")
+        yield node.expr  # expression
+
+    def visit_Return(self, node):
+        yield node.expr
+
+    def visit_If(self, node):
+        yield node.condition
+        for stmt in node.then_body:
+            yield stmt
+        for stmt in node.else_body:
+            yield stmt
+
+    def visit_While(self, node):
+        yield node.condition
+        for stmt in node.body:
+            yield stmt
+
+    def visit_For(self, node):
+        yield node.init
+        yield node.condition
+        yield node.update
+        for stmt in node.body:
+            yield stmt
+
+    def visit_ExprStmt(self, node):
+        yield node.expr
+
+    def visit_BinOp(self, node):
+        yield node.left
+        yield node.right
+
+    def visit_UnaryOp(self, node):
+        yield node.operand
+
+    def visit_Var(self, node):
+        var_name = node.name
+        if var_name not in self.symbol_table:
+            raise Exception(f"Semantic Error: Variable '{var_name}' used before declaration.")
+
+    def visit_Number(self, node):
+        pass  # constants are okay
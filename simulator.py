@@ -1,96 +1,275 @@
-def resolve(variables, val):
-    # Recursively resolve temporaries and variables
-    if isinstance(val, int):
+import time
+
+from tac import iter_rows, format_instr, Instr, c_not, constant_key, EVALUATE, FUNCTION, LABEL, COPY, NOT, IFNOT, GOTO, RETURN
+
+def constant(val):
+    # The value of a constant operand, or None for a variable or temporary
+    if isinstance(val, (int, float)):
         return val
     if val.isdigit() or (val.startswith('-') and val[1:].isdigit()):
         return int(val)
-    if val in variables:
-        if variables[val] == val:
-            return 0
-        return resolve(variables, variables[val])
-    return 0
+    return None
 
-def simulate_return(tac_code):
-    print("\n" + "=" * 31)
-    print("FINAL OUTPUT (Simulated Return)")
-    print("=" * 31)
+INFINITY = float("inf")
+
+# Steps between budget checks
+CHECK_INTERVAL = 10_000
+
+class Budget:
+    # Limits on one run: at most max_steps instructions and timeout seconds
+    # of wall-clock time (None for no limit). The loops check it only when a
+    # jump is taken and `interval` steps have passed since the last check:
+    # code that never jumps back ends on its own, so a step limit is
+    # overshot by at most one straight run of instructions. After the run,
+    # `exceeded` names the limit that stopped it, if any.
+    def __init__(self, max_steps=None, timeout=None, interval=CHECK_INTERVAL):
+        self.max_steps = max_steps
+        self.timeout = timeout
+        self.interval = interval
+        self.deadline = None
+        self.exceeded = None
+        self.steps = 0
+
+    def start(self):
+        # Returns the step count of the first check
+        self.deadline = time.perf_counter() + self.timeout if self.timeout is not None else None
+        self.exceeded = None
+        return self.next_check(0)
 
-    variables = {}
+    def next_check(self, steps):
+        limit = steps + self.interval
+        return limit if self.max_steps is None else min(limit, self.max_steps)
+
+    def check(self, steps):
+        # Returns the step count of the next check, or None to stop the run
+        if self.max_steps is not None and steps >= self.max_steps:
+            self.exceeded = "steps"
+            return None
+        if self.deadline is not None and time.perf_counter() >= self.deadline:
+            self.exceeded = "timeout"
+            return None
+        return self.next_check(steps)
+
+    def report(self):
+        return {"max_steps": self.max_steps, "timeout": self.timeout, "steps": self.steps,
+                "exceeded": self.exceeded is not None, "reason": self.exceeded}
+
+    def describe(self):
+        if self.exceeded == "steps":
+            return f"Budget exceeded: step limit of {self.max_steps} reached after {self.steps} step(s)"
+        return f"Budget exceeded: timeout of {self.timeout}s reached after {self.steps} step(s)"
+
+def layout(tac_code):
+    # The instructions without label and function markers, and a map of
+    # labels to instruction indexes
     labels = {}
-    lines = []
+    rows = []
+    for row in iter_rows(tac_code):
+        if row[0] == LABEL:
+            labels[row[1]] = len(rows)
+        elif row[0] != FUNCTION:
+            rows.append(row)
+    return rows, labels
 
-    # Preprocess: map labels to line numbers and build clean lines
-    for idx, line in enumerate(tac_code):
-        line = line.strip()
-        if line.endswith(":"):
-            labels[line[:-1]] = len(lines)
+def decode(tac_code):
+    return decode_rows(*layout(tac_code))
+
+def decode_rows(rows, labels):
+    # Decode TAC once into (opcode, dest_slot, a_slot, b_slot, target_pc)
+    # tuples over a list of values. Every name gets a slot that starts at 0
+    # (reading an unassigned name gives 0) and every constant gets a slot
+    # preloaded with its value, so each operand is a single list index.
+    # Returns the code and the initial values.
+    slots = {}
+    values = []
+
+    def slot(val):
+        if val is None:
+            return None
+        value = constant(val)
+        key = constant_key(val if value is None else value)
+        index = slots.get(key)
+        if index is None:
+            index = slots[key] = len(values)
+            values.append(0 if value is None else value)
+        return index
+
+    code = []
+    for op, dest, a, b in rows:
+        if op in (IFNOT, GOTO):
+            if dest not in labels:
+                raise Exception(f"Undefined label: {dest}")
+            code.append((op, None, slot(a), None, labels[dest]))
         else:
-            lines.append(line)
+            code.append((op, slot(dest), slot(a), slot(b), None))
+    return code, values
 
+def execute(code, values, budget=None):
+    # Run decoded code over `values` (updated in place). Returns the value of
+    # the RETURN reached, or None if execution ran off the end of the code or
+    # exceeded the budget, and the number of instructions executed.
+    limit = budget.start() if budget is not None else INFINITY
+    evaluate = EVALUATE
+    end = len(code)
     pc = 0
-    while pc < len(lines):
-        line = lines[pc]
-        if line.startswith("IF NOT"):
-            # IF NOT cond GOTO label
-            parts = line.split()
-            cond = parts[2]
-            label = parts[4]
-            cond_val = resolve(variables, cond)
-            if not cond_val:
-                pc = labels[label]
+    steps = 0
+    while pc < end:
+        op, dest, a, b, target = code[pc]
+        steps += 1
+        if op == IFNOT:
+            if not values[a]:
+                pc = target
+                if steps >= limit:
+                    limit = budget.check(steps)
+                    if limit is None:
+                        return None, steps
                 continue
-        elif line.startswith("GOTO"):
-            label = line.split()[1]
-            pc = labels[label]
+        elif op == GOTO:
+            pc = target
+            if steps >= limit:
+                limit = budget.check(steps)
+                if limit is None:
+                    return None, steps
             continue
-        elif line.startswith("RETURN"):
-            ret_var = line.split()[1]
-            value = resolve(variables, ret_var)
-            print(f"Return Value: {value}")
-            return
-        elif "=" in line:
-            left, right = map(str.strip, line.split("=", 1))
-            tokens = right.split()
-            if len(tokens) == 3:
-                a, op, b = tokens
-                a_val = resolve(variables, a)
-                b_val = resolve(variables, b)
-                try:
-                    if op == '+':
-                        variables[left] = a_val + b_val
-                    elif op == '-':
-                        variables[left] = a_val - b_val
-                    elif op == '*':
-                        variables[left] = a_val * b_val
-                    elif op == '/':
-                        variables[left] = a_val // b_val if b_val != 0 else 0
-                    elif op == '%':
-                        variables[left] = a_val % b_val if b_val != 0 else 0
-                    elif op == '&&':
-                        variables[left] = int(bool(a_val) and bool(b_val))
-                    elif op == '||':
-                        variables[left] = int(bool(a_val) or bool(b_val))
-                    elif op == '==':
-                        variables[left] = int(a_val == b_val)
-                    elif op == '!=':
-                        variables[left] = int(a_val != b_val)
-                    elif op == '<':
-                        variables[left] = int(a_val < b_val)
-                    elif op == '>':
-                        variables[left] = int(a_val > b_val)
-                    elif op == '<=':
-                        variables[left] = int(a_val <= b_val)
-                    elif op == '>=':
-                        variables[left] = int(a_val >= b_val)
-                    else:
-                        variables[left] = 0
-                except Exception as e:
-                    variables[left] = 0
-            elif len(tokens) == 2 and tokens[0] == '!':
-                # Unary not
-                val = resolve(variables, tokens[1])
-                variables[left] = int(not bool(val))
-            elif len(tokens) == 1:
-                val = tokens[0]
-                variables[left] = resolve(variables, val)
+        elif op == COPY:
+            values[dest] = values[a]
+        elif op == RETURN:
+            return values[a], steps
+        elif op == NOT:
+            # Unary not
+            values[dest] = c_not(values[a])
+        elif op in evaluate:
+            try:
+                values[dest] = evaluate[op](values[a], values[b])
+            except Exception as e:
+                values[dest] = 0
         pc += 1
+    return None, steps
+
+def execute_profiled(code, values, profile, budget=None):
+    # execute() that also counts, per instruction, how often it ran and how
+    # often its jump was taken. A separate loop, so that execute() pays
+    # nothing for profiling.
+    limit = budget.start() if budget is not None else INFINITY
+    hits = profile.hits
+    taken = profile.taken
+    evaluate = EVALUATE
+    end = len(code)
+    pc = 0
+    steps = 0
+    while pc < end:
+        op, dest, a, b, target = code[pc]
+        steps += 1
+        hits[pc] += 1
+        if op == IFNOT:
+            if not values[a]:
+                taken[pc] += 1
+                pc = target
+                if steps >= limit:
+                    limit = budget.check(steps)
+                    if limit is None:
+                        return None, steps
+                continue
+        elif op == GOTO:
+            taken[pc] += 1
+            pc = target
+            if steps >= limit:
+                limit = budget.check(steps)
+                if limit is None:
+                    return None, steps
+            continue
+        elif op == COPY:
+            values[dest] = values[a]
+        elif op == RETURN:
+            return values[a], steps
+        elif op == NOT:
+            values[dest] = c_not(values[a])
+        elif op in evaluate:
+            try:
+                values[dest] = evaluate[op](values[a], values[b])
+            except Exception as e:
+                values[dest] = 0
+        pc += 1
+    return None, steps
+
+class Profile:
+    # Per-instruction hit counts and jump-taken counts of one run, indexed
+    # like the instructions from layout()
+    def __init__(self, rows, labels):
+        self.rows = rows
+        self.labels = labels
+        self.hits = [0] * len(rows)
+        self.taken = [0] * len(rows)
+        self.steps = 0
+
+    def report(self):
+        # JSON-ready summary. A label counts the times execution reached the
+        # instruction it marks; a loop (a label some jump goes back to) counts
+        # its trips, i.e. the backward jumps taken to it.
+        rows, hits, taken, labels = self.rows, self.hits, self.taken, self.labels
+        loops = {}
+        branches = []
+        for pc, (op, dest, a, b) in enumerate(rows):
+            if op not in (IFNOT, GOTO):
+                continue
+            if labels[dest] <= pc:
+                loops[dest] = loops.get(dest, 0) + taken[pc]
+            if op == IFNOT:
+                branches.append({"pc": pc, "instr": format_instr(Instr(*rows[pc])), "taken": taken[pc],
+                                 "not_taken": hits[pc] - taken[pc],
+                                 "taken_ratio": taken[pc] / hits[pc] if hits[pc] else None})
+        return {
+            "steps": self.steps,
+            "hits": [{"pc": pc, "instr": format_instr(Instr(*row)), "hits": hits[pc]}
+                     for pc, row in enumerate(rows) if hits[pc]],
+            "labels": {label: hits[pc] if pc < len(rows) else 0 for label, pc in labels.items()},
+            "loops": loops,
+            "branches": branches,
+        }
+
+    def listing(self):
+        # The TAC with each instruction's hit count, and taken counts on jumps
+        marks = {}
+        for label, pc in self.labels.items():
+            marks.setdefault(pc, []).append(label)
+        width = len(str(max(self.hits, default=0)))
+        lines = []
+        for pc, row in enumerate(self.rows):
+            for label in marks.get(pc, ()):
+                lines.append(f"{'':>{width}}  {label}:")
+            line = f"{self.hits[pc]:>{width}}  {format_instr(Instr(*row))}"
+            if row[0] == IFNOT:
+                line += f"  # taken {self.taken[pc]}/{self.hits[pc]}"
+            lines.append(line)
+        for label in marks.get(len(self.rows), ()):
+            lines.append(f"{'':>{width}}  {label}:")
+        return lines
+
+def simulate_return(tac_code, backend="interpreter", profile=False, budget=None):
+    # backend "jit" runs the code compiled to Python functions (jit.py)
+    # instead of interpreting it. With profile, the interpreter records a
+    # Profile of the run, which is returned. A Budget limits the interpreted
+    # run; a run stopped by it keeps the profile gathered so far.
+    print("\n" + "=" * 31)
+    print("FINAL OUTPUT (Simulated Return)")
+    print("=" * 31)
+
+    result = None
+    if backend == "jit":
+        from jit import CompiledProgram
+        value = CompiledProgram(tac_code).run()
+    else:
+        if profile:
+            rows, labels = layout(tac_code)
+            result = Profile(rows, labels)
+            value, result.steps = execute_profiled(*decode_rows(rows, labels), result, budget)
+            steps = result.steps
+        else:
+            value, steps = execute(*decode(tac_code), budget)
+        if budget is not None:
+            budget.steps = steps
+            if budget.exceeded is not None:
+                print(budget.describe())
+    if value is not None:
+        print(f"Return Value: {value}")
+    return result
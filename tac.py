@@ -0,0 +1,311 @@
+import itertools
+import math
+import operator
+import re
+from array import array
+
+# ---------- Opcodes ----------
+# Opcodes are small ints, like the lexer's token types; OPCODE_NAMES maps them back.
+(FUNCTION, LABEL, COPY, NOT,
+ ADD, SUB, MUL, DIV, MOD, AND, OR, EQ, NE, LT, GT, LE, GE,
+ IFNOT, GOTO, RETURN) = range(20)
+OPCODE_NAMES = ("FUNCTION", "LABEL", "COPY", "NOT",
+                "ADD", "SUB", "MUL", "DIV", "MOD", "AND", "OR", "EQ", "NE", "LT", "GT", "LE", "GE",
+                "IFNOT", "GOTO", "RETURN")
+
+# Binary operator symbol <-> opcode
+BINARY_OPCODES = {"+": ADD, "-": SUB, "*": MUL, "/": DIV, "%": MOD, "&&": AND, "||": OR,
+                  "==": EQ, "!=": NE, "<": LT, ">": GT, "<=": LE, ">=": GE}
+OPERATOR_SYMBOLS = {opcode: symbol for symbol, opcode in BINARY_OPCODES.items()}
+
+# Opcodes that assign to `dest`
+ASSIGNMENTS = frozenset({COPY, NOT} | set(BINARY_OPCODES.values()))
+
+# ---------- Operator semantics ----------
+# Shared by the simulator and the optimizer so folding at compile time gives
+# exactly what running the code would. Integer division and remainder
+# truncate toward zero as in C; dividing by zero yields 0 (the simulator's
+# long-standing behaviour) instead of raising.
+def c_div(a, b):
+    if b == 0:
+        return 0
+    if type(a) is int and type(b) is int:
+        quotient = abs(a) // abs(b)
+        return -quotient if (a < 0) != (b < 0) else quotient
+    return a / b
+
+def c_mod(a, b):
+    if b == 0:
+        return 0
+    return a - b * c_div(a, b) if type(a) is int and type(b) is int else operator.mod(a, b)
+
+def c_and(a, b):
+    return 1 if a and b else 0
+
+def c_or(a, b):
+    return 1 if a or b else 0
+
+def c_not(a):
+    return 0 if a else 1
+
+EVALUATE = {
+    ADD: operator.add, SUB: operator.sub, MUL: operator.mul, DIV: c_div, MOD: c_mod,
+    AND: c_and, OR: c_or,
+    EQ: lambda a, b: int(a == b), NE: lambda a, b: int(a != b),
+    LT: lambda a, b: int(a < b), GT: lambda a, b: int(a > b),
+    LE: lambda a, b: int(a <= b), GE: lambda a, b: int(a >= b),
+}
+
+def is_constant(operand):
+    return type(operand) is int or type(operand) is float
+
+def constant_key(operand):
+    # Dict key for an operand. 1 and 1.0 compare equal, so constants are
+    # keyed by type as well; names (and None) are their own key.
+    return operand if type(operand) is str or operand is None else (type(operand), operand)
+
+class Instr:
+    # One three-address instruction: `dest = a op b`. Operands are ints (or
+    # floats) for constants and interned strs for variables and temps. For
+    # FUNCTION, LABEL, GOTO and IFNOT, `dest` holds the function or label
+    # name; IFNOT tests `a`, RETURN returns `a`.
+    __slots__ = ("op", "dest", "a", "b")
+
+    def __init__(self, op, dest=None, a=None, b=None):
+        self.op = op
+        self.dest = dest
+        self.a = a
+        self.b = b
+
+    def __str__(self):
+        return format_instr(self)
+
+    def __repr__(self):
+        return f"Instr({OPCODE_NAMES[self.op]}, {self.dest!r}, {self.a!r}, {self.b!r})"
+
+class OperandTable:
+    # Interns operands so every occurrence of a name shares one object, and
+    # gives each distinct operand a small index.
+    def __init__(self):
+        self.values = []
+        self.indexes = {}
+
+    def index(self, value):
+        key = constant_key(value)
+        index = self.indexes.get(key)
+        if index is None:
+            index = self.indexes[key] = len(self.values)
+            self.values.append(value)
+        return index
+
+    def intern(self, value):
+        return self.values[self.index(value)]
+
+# ---------- Instruction containers ----------
+# TACGenerator emits through code.emit(op, dest, a, b), so it can fill either
+# container below.
+class InstrList(list):
+    # Plain list of Instr objects, easy to rewrite in place (used by the optimizer)
+    def emit(self, op, dest=None, a=None, b=None):
+        self.append(Instr(op, dest, a, b))
+
+    def rows(self):
+        for instr in self:
+            yield instr.op, instr.dest, instr.a, instr.b
+
+class InstrArray:
+    # Columnar storage for very large functions: one array column each for
+    # opcode, dest, src1 and src2, i.e. 13 bytes per instruction.
+    #
+    # Operand fields are int codes: >= 0 indexes the operand table, -1 is an
+    # unused field, and the generated names t<N> and L<N> (one new name per
+    # few instructions) are packed into the code itself as -2 - 2N and
+    # -3 - 2N so they never take a table slot.
+    __slots__ = ("operands", "ops", "dests", "srcs1", "srcs2")
+
+    def __init__(self, operands=None):
+        self.operands = operands if operands is not None else OperandTable()
+        self.ops = array('B')
+        self.dests = array('i')
+        self.srcs1 = array('i')
+        self.srcs2 = array('i')
+
+    def encode(self, value):
+        if value is None:
+            return -1
+        if type(value) is str and value[:1] in ("t", "L"):
+            digits = value[1:]
+            if digits.isdigit() and digits[:1] != "0" and len(digits) < 10:
+                return -2 - 2 * int(digits) - (value[0] == "L")
+        return self.operands.index(value)
+
+    def decode(self, code):
+        if code >= 0:
+            return self.operands.values[code]
+        if code == -1:
+            return None
+        number, is_label = divmod(-2 - code, 2)
+        return f"L{number}" if is_label else f"t{number}"
+
+    def emit(self, op, dest=None, a=None, b=None):
+        encode = self.encode
+        self.ops.append(op)
+        self.dests.append(encode(dest))
+        self.srcs1.append(encode(a))
+        self.srcs2.append(encode(b))
+
+    def append(self, instr):
+        self.emit(instr.op, instr.dest, instr.a, instr.b)
+
+    def extend(self, instrs):
+        for instr in instrs:
+            self.append(instr)
+
+    def rows(self):
+        # Decoded (op, dest, a, b) tuples straight from the columns
+        values = self.operands.values
+        decode = self.decode
+        for op, dest, a, b in zip(self.ops, self.dests, self.srcs1, self.srcs2):
+            yield (op,
+                   values[dest] if dest >= 0 else decode(dest),
+                   values[a] if a >= 0 else decode(a),
+                   values[b] if b >= 0 else decode(b))
+
+    def __len__(self):
+        return len(self.ops)
+
+    def __getitem__(self, index):
+        decode = self.decode
+        return Instr(self.ops[index], decode(self.dests[index]), decode(self.srcs1[index]), decode(self.srcs2[index]))
+
+    def __iter__(self):
+        for op, dest, a, b in self.rows():
+            yield Instr(op, dest, a, b)
+
+# ---------- Pretty printer ----------
+def format_operand(operand):
+    # Folding can produce inf and nan, whose str() would read back as a
+    # name; with a sign they stay numbers for parse_operand
+    if type(operand) is float and not math.isfinite(operand) and operand != -math.inf:
+        return f"+{operand}"
+    return str(operand)
+
+def format_instr(instr):
+    op = instr.op
+    if op in OPERATOR_SYMBOLS:
+        return f"{instr.dest} = {format_operand(instr.a)} {OPERATOR_SYMBOLS[op]} {format_operand(instr.b)}"
+    if op == COPY:
+        return f"{instr.dest} = {format_operand(instr.a)}"
+    if op == LABEL:
+        return f"{instr.dest}:"
+    if op == IFNOT:
+        return f"IF NOT {format_operand(instr.a)} GOTO {instr.dest}"
+    if op == GOTO:
+        return f"GOTO {instr.dest}"
+    if op == RETURN:
+        return f"RETURN {format_operand(instr.a)}"
+    if op == NOT:
+        return f"{instr.dest} = ! {format_operand(instr.a)}"
+    return f"\n# Function Function({instr.dest})"
+
+def defined(instr):
+    # Name assigned by the instruction, if any
+    return instr.dest if instr.op in ASSIGNMENTS else None
+
+def used(instr):
+    # Names read by the instruction
+    a, b = instr.a, instr.b
+    if type(a) is str:
+        return (a, b) if type(b) is str else (a,)
+    return (b,) if type(b) is str else ()
+
+def is_temp(operand):
+    # Compiler temporaries are named t1, t2, ...
+    return isinstance(operand, str) and operand[:1] == "t" and operand[1:].isdigit()
+
+def fresh_names(instrs, prefix="t"):
+    # Iterator of unused names <prefix><N> (temps t<N>, labels L<N>),
+    # numbered after the highest such name in instrs
+    highest = 0
+    for instr in instrs:
+        for name in (instr.dest,) + used(instr):
+            if type(name) is str and name[:1] == prefix and name[1:].isdigit():
+                highest = max(highest, int(name[1:]))
+    return (f"{prefix}{number}" for number in itertools.count(highest + 1))
+
+def parse_number(text):
+    return int(text) if text.lstrip("+-").isdigit() else float(text)
+
+# ---------- Text reader ----------
+# One precompiled pattern classifies a line of textual TAC; the group that
+# matched tells which instruction form it is.
+TAC_LINE_REGEX = re.compile(r"""
+    \#\s*Function\s+Function\((?P<function>\w+)\)
+  | (?P<label>\w+):
+  | IF\ NOT\ (?P<cond>\S+)\ GOTO\ (?P<cond_target>\w+)
+  | GOTO\ (?P<target>\w+)
+  | RETURN\ (?P<ret>\S+)
+  | (?P<not_dest>\w+)\s*=\s*!\s*(?P<not_src>\S+)
+  | (?P<bin_dest>\w+)\s*=\s*(?P<left>[^\s=]+)\s+(?P<bin_op>&&|\|\||[=!<>]=|[-+*/%<>])\s+(?P<right>\S+)
+  | (?P<copy_dest>\w+)\s*=\s*(?P<copy_src>\S+)
+""", re.VERBOSE)
+
+# Decimal literals and every float as printed by format_operand (1e+24,
+# +inf, -inf, +nan); a bare inf or nan is a name
+NUMBER_REGEX = re.compile(r"[-+]?\d+(\.\d+)?([eE][-+]?\d+)?|[-+](inf|nan)")
+
+def parse_operand(text, operands=None):
+    if NUMBER_REGEX.fullmatch(text):
+        return parse_number(text)
+    return operands.intern(text) if operands is not None else text
+
+def parse_tac(lines, operands=None):
+    # Read textual TAC (as printed by format_instr) back into instructions.
+    # Comments other than function headers and trailing "# ..." notes are ignored.
+    if operands is None:
+        operands = OperandTable()
+    code = InstrList()
+    for line in lines:
+        line = line.strip()
+        if not line.startswith("#"):
+            line = line.split("#", 1)[0].rstrip()
+        match = TAC_LINE_REGEX.fullmatch(line)
+        if match is None:
+            if line and not line.startswith("#"):
+                raise SyntaxError(f"Unrecognized TAC: {line}")
+            continue
+        kind = match.lastgroup
+        groups = match.groupdict()
+        if kind == "function":
+            code.append(Instr(FUNCTION, groups["function"]))
+        elif kind == "label":
+            code.append(Instr(LABEL, groups["label"]))
+        elif kind == "cond_target":
+            code.append(Instr(IFNOT, groups["cond_target"], parse_operand(groups["cond"], operands)))
+        elif kind == "target":
+            code.append(Instr(GOTO, groups["target"]))
+        elif kind == "ret":
+            code.append(Instr(RETURN, None, parse_operand(groups["ret"], operands)))
+        elif kind == "not_src":
+            code.append(Instr(NOT, operands.intern(groups["not_dest"]), parse_operand(groups["not_src"], operands)))
+        elif kind == "right":
+            code.append(Instr(BINARY_OPCODES[groups["bin_op"]], operands.intern(groups["bin_dest"]),
+                              parse_operand(groups["left"], operands), parse_operand(groups["right"], operands)))
+        else:
+            code.append(Instr(COPY, operands.intern(groups["copy_dest"]), parse_operand(groups["copy_src"], operands)))
+    return code
+
+def as_instrs(code):
+    # Accept instructions, an InstrArray or textual TAC lines; returns a list of Instr
+    if isinstance(code, InstrArray):
+        return InstrList(code)
+    if code and isinstance(code[0], str):
+        return parse_tac(code)
+    return code
+
+def iter_rows(code):
+    # (op, dest, a, b) for every instruction, without building Instr objects
+    # when the code is already columnar
+    if hasattr(code, "rows"):
+        return code.rows()
+    return InstrList(as_instrs(code)).rows()
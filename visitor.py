@@ -0,0 +1,52 @@
+from types import GeneratorType
+
+import ast_nodes
+
+# Every concrete node class that a pass can be asked to visit
+NODE_CLASSES = [cls for cls in vars(ast_nodes).values()
+                if isinstance(cls, type) and issubclass(cls, ast_nodes.ASTNode) and cls is not ast_nodes.ASTNode]
+
+class NodeVisitor:
+    # Base class for compiler passes. A pass defines visit_<NodeClass> methods
+    # (visit_BinOp, visit_If, ...); when the subclass is created those are
+    # collected into a node class -> function table, so visiting a node is a
+    # single dict lookup instead of a chain of type or label tests.
+    #
+    # Visit methods never call visit() on children. A method that needs a
+    # child's result is written as a generator and yields the child
+    # (`left = yield node.left`); visit() drives those generators from an
+    # explicit stack, so deeply nested trees do not hit the recursion limit.
+    # Methods that need no children can simply return a value.
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        generic = cls.generic_visit
+        cls._dispatch = {node_cls: getattr(cls, f"visit_{node_cls.__name__}", generic)
+                         for node_cls in NODE_CLASSES}
+
+    def visit(self, node):
+        dispatch = self._dispatch
+        generic = type(self).generic_visit
+        result = dispatch.get(type(node), generic)(self, node)
+        if type(result) is not GeneratorType:
+            return result
+
+        stack = [result]
+        value = None
+        while stack:
+            try:
+                child = stack[-1].send(value)
+            except StopIteration as stop:
+                stack.pop()
+                value = stop.value
+                continue
+            value = dispatch.get(type(child), generic)(self, child)
+            if type(value) is GeneratorType:
+                stack.append(value)
+                value = None
+        return value
+
+    def generic_visit(self, node):
+        # For future node types
+        for child in node.children:
+            yield child
@@ -0,0 +1,103 @@
+from assembler import assemble, OPCODES, NONE, TABLE, REGISTER, PREFIXES
+from codegen import ASM_OPS
+from tac import parse_operand, constant_key, EVALUATE, c_not
+
+# ---------- Register VM for CodeGenerator output ----------
+# Runs the assembly itself rather than the TAC it came from. Registers and
+# memory (variables and spilled temps, by name) each get a slot in one list
+# of values; every constant gets a slot preloaded with its value, so an
+# operand is always a single list index. Unassigned slots read as 0, like
+# unassigned names in the simulator. CMP sets the equal flag that JE tests;
+# RET returns R0. Execution starts at the first instruction.
+
+MOV, NOT, CMP, JE, JMP, RET = (OPCODES[name] for name in ("MOV", "NOT", "CMP", "JE", "JMP", "RET"))
+# Two-operand arithmetic and compare-and-set: dst = dst op src
+OPERATIONS = {OPCODES[name]: EVALUATE[op] for op, name in ASM_OPS.items()}
+
+def decode(obj):
+    # Decode assembly lines or an ObjectCode (assembler.py) into
+    # (opcode, dst_slot, src_slot, target_pc) tuples. Returns the code, the
+    # initial values and the slot of R0.
+    if isinstance(obj, list):
+        obj = assemble(obj)
+    slots = {}
+    values = []
+
+    def slot(kind, value):
+        if kind == TABLE:
+            value = parse_operand(obj.operands[value])
+            key = constant_key(value)
+        else:
+            key = f"{PREFIXES[kind]}{value}"
+        index = slots.get(key)
+        if index is None:
+            index = slots[key] = len(values)
+            values.append(0 if type(key) is str else value)
+        return index
+
+    # Label (kind, value) -> instruction index; comments are never jumped to
+    labels = {}
+    marks = obj.marks
+    for mark in range(0, len(marks), 2):
+        code = marks[mark + 1]
+        labels[code & 7, code >> 3] = marks[mark]
+
+    code = []
+    for op, kinds, dest, src in zip(obj.ops, obj.kinds, obj.dests, obj.srcs):
+        dest_kind, src_kind = kinds & 15, kinds >> 4
+        if op in (JE, JMP):
+            target = labels.get((dest_kind, dest))
+            if target is None:
+                raise Exception(f"Undefined label: {obj.decode(dest_kind, dest)}")
+            code.append((op, None, None, target))
+        else:
+            code.append((op,
+                         None if dest_kind == NONE else slot(dest_kind, dest),
+                         None if src_kind == NONE else slot(src_kind, src),
+                         None))
+    return code, values, slot(REGISTER, 0)
+
+def execute(code, values, result):
+    # Run decoded code over `values` (updated in place). Returns the value in
+    # the `result` slot at RET, or None if execution ran off the end of the
+    # code, and the number of instructions executed.
+    operations = OPERATIONS
+    end = len(code)
+    equal = False
+    pc = 0
+    steps = 0
+    while pc < end:
+        op, dest, src, target = code[pc]
+        steps += 1
+        if op == MOV:
+            values[dest] = values[src]
+        elif op in operations:
+            try:
+                values[dest] = operations[op](values[dest], values[src])
+            except Exception as e:
+                values[dest] = 0
+        elif op == CMP:
+            equal = values[dest] == values[src]
+        elif op == JE:
+            if equal:
+                pc = target
+                continue
+        elif op == JMP:
+            pc = target
+            continue
+        elif op == RET:
+            return values[result], steps
+        elif op == NOT:
+            values[dest] = c_not(values[dest])
+        pc += 1
+    return None, steps
+
+def simulate_machine(asm):
+    # Like simulator.simulate_return, for the generated assembly
+    print("\n" + "=" * 31)
+    print("FINAL OUTPUT (Simulated Return)")
+    print("=" * 31)
+    value, steps = execute(*decode(asm))
+    if value is not None:
+        print(f"Return Value: {value}")
+    print(f"Executed {steps} instruction(s)")